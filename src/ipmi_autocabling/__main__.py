@@ -2,6 +2,7 @@
 
 import argparse
 import os
+import signal
 import sys
 
 from dotenv import load_dotenv
@@ -11,6 +12,12 @@ from .logging_config import setup_logging
 from .service import IPMIAutoCablingService
 
 
+def _exit_on_sigterm(signum, frame):
+    """Turn SIGTERM (docker stop) into SystemExit so finally blocks and
+    logging.shutdown() run and buffered log output is flushed."""
+    raise SystemExit(128 + signum)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="IPMI Auto-Cabling Service for NetBox"
@@ -49,6 +56,7 @@ def main():
         load_dotenv(args.env_file)
 
     setup_logging(level=args.log_level, format_type=args.log_format)
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
 
     config = Config.from_env()
 
@@ -6,6 +6,9 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
+# Characters that make an uplink pattern a real regex rather than a plain substring
+REGEX_METACHARS = frozenset(".^$*+?{}[]\\|()")
+
 
 @dataclass
 class Config:
@@ -29,6 +32,9 @@ class Config:
     snmp_version: str = "2c"
     snmp_timeout: int = 5
     snmp_retries: int = 2
+    snmp_max_repetitions: int = 50  # var-binds per GETBULK request
+    snmp_async: bool = False  # poll switches on one asyncio loop instead of threads
+    fdb_workers: int = 16  # switches polled in parallel
 
     # Port classification
     uplink_ports: list[str] = field(default_factory=list)
@@ -59,6 +65,11 @@ class Config:
     # MLAG groups: list of tuples (switch1_name, switch2_name)
     mlag_groups: list[tuple[str, str]] = field(default_factory=list)
 
+    # (patterns, matchers) last built by _uplink_matchers()
+    _uplink_matchers_cache: Optional[tuple[tuple[str, ...], tuple]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
     @classmethod
     def from_env(cls) -> "Config":
         """Load configuration from environment variables."""
@@ -77,6 +88,9 @@ class Config:
         config.snmp_version = os.getenv("SNMP_VERSION", "2c")
         config.snmp_timeout = int(os.getenv("SNMP_TIMEOUT", "5"))
         config.snmp_retries = int(os.getenv("SNMP_RETRIES", "2"))
+        config.snmp_max_repetitions = int(os.getenv("SNMP_MAX_REPETITIONS", "50"))
+        config.snmp_async = os.getenv("SNMP_ASYNC", "false").lower() == "true"
+        config.fdb_workers = int(os.getenv("FDB_WORKERS", "16"))
 
         if uplink_ports := os.getenv("UPLINK_PORTS"):
             config.uplink_ports = [p.strip() for p in uplink_ports.split(",")]
@@ -98,9 +112,73 @@ class Config:
                 if len(parts) == 2:
                     config.mlag_groups.append((parts[0].strip(), parts[1].strip()))
 
+        # Compile uplink matchers at load: a bad UPLINK_PATTERNS fails at startup
+        config._uplink_matchers()
+
         return config
 
     def get_uplink_pattern(self) -> re.Pattern:
-        """Compile uplink patterns into a single regex."""
+        """
+        Compile uplink patterns into a single regex.
+
+        Kept for external callers; match_uplink() is the faster path.
+        re.compile() caches the result, so repeated calls are cheap.
+        """
         combined = "|".join(f"({p})" for p in self.uplink_patterns)
         return re.compile(combined, re.IGNORECASE)
+
+    def _uplink_matchers(self) -> tuple[tuple[str, ...], Optional[re.Pattern]]:
+        """
+        Uplink patterns split into lowercase literals and a regex remainder.
+
+        Cached per pattern list, so reassigning or editing uplink_patterns
+        takes effect on the next match.
+        """
+        patterns = tuple(self.uplink_patterns)
+        cached = self._uplink_matchers_cache
+        if cached is None or cached[0] != patterns:
+            cached = (patterns, self._build_uplink_matchers(patterns))
+            self._uplink_matchers_cache = cached
+        return cached[1]
+
+    @staticmethod
+    def _build_uplink_matchers(
+        patterns: tuple[str, ...],
+    ) -> tuple[tuple[str, ...], Optional[re.Pattern]]:
+        """Compile uplink matchers for a pattern list."""
+        literals = []
+        regexes = []
+        for p in patterns:
+            if REGEX_METACHARS.isdisjoint(p):
+                literals.append(p.lower())
+            else:
+                regexes.append(p)
+
+        regex = None
+        if regexes:
+            # Non-capturing: match_uplink only needs the overall match
+            regex = re.compile("|".join(f"(?:{p})" for p in regexes), re.IGNORECASE)
+        return tuple(literals), regex
+
+    def match_uplink(self, text: str) -> Optional[str]:
+        """
+        Match text against uplink patterns.
+
+        Plain-substring patterns are checked with a case-insensitive substring
+        scan; only the remaining patterns go through the regex engine.
+
+        Returns:
+            Matched part of text, or None if nothing matches
+        """
+        literals, regex = self._uplink_matchers()
+
+        text_lower = text.lower()
+        for literal in literals:
+            idx = text_lower.find(literal)
+            if idx >= 0:
+                return text[idx : idx + len(literal)]
+
+        if regex is not None and (match := regex.search(text)):
+            return match.group()
+
+        return None
@@ -6,7 +6,7 @@ from typing import Optional
 
 from .config import Config
 from .fdb_collector import FDBEntry
-from .mac_utils import normalize_mac
+from .mac_utils import mac_to_bytes, mac_to_str
 from .netbox_client import IPMIInterface, NetBoxClient, SwitchInfo
 from .port_classifier import PortClassifier, PortClassification
 from .state_db import MACStatus, StateDB
@@ -14,7 +14,7 @@ from .state_db import MACStatus, StateDB
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class CorrelationResult:
     """Result of MAC correlation."""
 
@@ -42,6 +42,17 @@ class CorrelationResult:
     actual_mac: Optional[str] = None  # MAC actually seen in FDB
 
 
+@dataclass(slots=True)
+class _Observed:
+    """IPMI MAC seen on an access port, awaiting its stability update."""
+
+    ipmi: IPMIInterface
+    mac: str
+    entry: FDBEntry
+    switch_info: SwitchInfo
+    port_classification: PortClassification
+
+
 class Correlator:
     """Correlate IPMI MACs with FDB entries."""
 
@@ -57,58 +68,90 @@ class Correlator:
         self.state_db = state_db
         self.port_classifier = port_classifier
 
-        self._mlag_peer_map: dict[str, str] = {}
-        for sw1, sw2 in config.mlag_groups:
-            self._mlag_peer_map[sw1] = sw2
-            self._mlag_peer_map[sw2] = sw1
+        # Unordered MLAG pairs, so peer lookup is a single set membership test
+        self._mlag_pairs: frozenset[frozenset[str]] = frozenset(
+            frozenset((sw1, sw2)) for sw1, sw2 in config.mlag_groups
+        )
 
     def correlate(
         self,
         ipmi_interfaces: list[IPMIInterface],
-        fdb_entries: list[FDBEntry],
+        fdb_by_mac: dict[bytes, list[FDBEntry]],
         switches: list[SwitchInfo],
+        port_to_mac: dict[str, dict[str, bytes]],
     ) -> list[CorrelationResult]:
         """
         Correlate IPMI interfaces with FDB entries.
 
+        Args:
+            ipmi_interfaces: IPMI interfaces from NetBox
+            fdb_by_mac: FDB entries of all switches, indexed by raw 6-byte MAC
+                (see index_fdb_by_mac)
+            switches: switches the FDB was collected from
+            port_to_mac: MAC seen on each switch port, for mismatch detection
+                (see index_fdb_by_port)
+
         Returns list of CorrelationResult for each IPMI interface.
         """
         switch_map = {sw.name: sw for sw in switches}
 
-        mac_to_fdb: dict[str, list[FDBEntry]] = {}
-        for entry in fdb_entries:
-            mac = normalize_mac(entry.mac)
-            if mac not in mac_to_fdb:
-                mac_to_fdb[mac] = []
-            mac_to_fdb[mac].append(entry)
-
-        # Build port->MAC map for mismatch detection
-        port_to_mac: dict[tuple[str, str], str] = {}
-        for entry in fdb_entries:
-            key = (entry.switch_name, entry.port_name)
-            # Store the MAC seen on each port (last one wins if multiple)
-            port_to_mac[key] = normalize_mac(entry.mac)
-
-        results = []
-        for ipmi in ipmi_interfaces:
-            result = self._correlate_one(ipmi, mac_to_fdb, switch_map, port_to_mac)
-            results.append(result)
+        # First pass resolves everything that needs no stability update;
+        # observations of the rest are written in one bulk statement.
+        # State writes of the run share one short transaction.
+        results: list[Optional[CorrelationResult]] = []
+        observed: list[tuple[int, _Observed]] = []
+        stability: dict[str, tuple[int, bool]] = {}
+        with self.state_db.batch():
+            for ipmi in ipmi_interfaces:
+                outcome = self._correlate_one(ipmi, fdb_by_mac, switch_map, port_to_mac)
+                if isinstance(outcome, _Observed):
+                    observed.append((len(results), outcome))
+                    results.append(None)
+                else:
+                    results.append(outcome)
+
+            if observed:
+                stability = self.state_db.update_observations_bulk(
+                    (
+                        (obs.mac, obs.entry.switch_name, obs.entry.port_name, obs.entry.vlan)
+                        for _, obs in observed
+                    ),
+                    stability_threshold=self.config.stability_runs,
+                )
+
+        if observed:
+            # Switch ports are only looked up for MACs observed on access
+            # ports: prefetch just those switches, outside the transaction
+            self.netbox.prefetch_switch_interfaces(
+                sorted({obs.switch_info.id for _, obs in observed})
+            )
+
+        for index, obs in observed:
+            stability_count, is_stable = stability[obs.mac]
+            results[index] = self._observed_result(obs, stability_count, is_stable)
 
         return results
 
     def _correlate_one(
         self,
         ipmi: IPMIInterface,
-        mac_to_fdb: dict[str, list[FDBEntry]],
+        fdb_by_mac: dict[bytes, list[FDBEntry]],
         switch_map: dict[str, SwitchInfo],
-        port_to_mac: dict[tuple[str, str], str],
-    ) -> CorrelationResult:
-        """Correlate single IPMI interface."""
-        mac = normalize_mac(ipmi.mac_address)
+        port_to_mac: dict[str, dict[str, bytes]],
+    ) -> CorrelationResult | _Observed:
+        """
+        Correlate single IPMI interface.
+
+        Returns the final result, or _Observed when the MAC sits on an
+        access port and the outcome depends on its stability count.
+        """
+        # mac_address is normalized when loaded from NetBox
+        mac = ipmi.mac_address
+        mac_bytes = mac_to_bytes(mac)
 
         # If cable exists, check for MAC mismatch
         if ipmi.has_cable:
-            mismatch = self._check_mismatch(ipmi, port_to_mac)
+            mismatch = self._check_mismatch(ipmi, mac_bytes, port_to_mac)
             if mismatch:
                 return mismatch
             return CorrelationResult(
@@ -118,7 +161,7 @@ class Correlator:
                 reason="IPMI interface already has cable",
             )
 
-        fdb_entries = mac_to_fdb.get(mac, [])
+        fdb_entries = fdb_by_mac.get(mac_bytes, [])
 
         if not fdb_entries:
             self.state_db.mark_not_found(mac)
@@ -167,13 +210,20 @@ class Correlator:
                 port_classification=port_classification,
             )
 
-        stability_count, is_stable = self.state_db.update_observation(
-            mac=mac,
-            switch_name=best_entry.switch_name,
-            port_name=best_entry.port_name,
-            vlan=best_entry.vlan,
-            stability_threshold=self.config.stability_runs,
-        )
+        return _Observed(ipmi, mac, best_entry, switch_info, port_classification)
+
+    def _observed_result(
+        self,
+        obs: _Observed,
+        stability_count: int,
+        is_stable: bool,
+    ) -> CorrelationResult:
+        """Build result for an access-port observation once its stability is known."""
+        ipmi = obs.ipmi
+        mac = obs.mac
+        best_entry = obs.entry
+        switch_info = obs.switch_info
+        port_classification = obs.port_classification
 
         switch_iface = self.netbox.get_switch_interface_by_name(
             switch_info.id, best_entry.port_name
@@ -269,12 +319,13 @@ class Correlator:
 
     def _are_mlag_peers(self, switch1: str, switch2: str) -> bool:
         """Check if two switches are MLAG peers."""
-        return self._mlag_peer_map.get(switch1) == switch2
+        return frozenset((switch1, switch2)) in self._mlag_pairs
 
     def _check_mismatch(
         self,
         ipmi: IPMIInterface,
-        port_to_mac: dict[tuple[str, str], str],
+        ipmi_mac: bytes,
+        port_to_mac: dict[str, dict[str, bytes]],
     ) -> Optional[CorrelationResult]:
         """
         Check if MAC on cable's port differs from expected.
@@ -285,19 +336,23 @@ class Correlator:
         if not ipmi.cable_peer_switch or not ipmi.cable_peer_port:
             return None
 
-        expected_mac = normalize_mac(ipmi.mac_address)
-        port_key = (ipmi.cable_peer_switch, ipmi.cable_peer_port)
-        actual_mac = port_to_mac.get(port_key)
+        actual_mac_bytes = port_to_mac.get(ipmi.cable_peer_switch, {}).get(ipmi.cable_peer_port)
 
-        if actual_mac is None:
+        if actual_mac_bytes is None:
             # MAC not seen on port - could be device offline
             return None
 
-        if actual_mac != expected_mac:
+        if actual_mac_bytes != ipmi_mac:
+            expected_mac = mac_to_str(ipmi_mac)
+            actual_mac = mac_to_str(actual_mac_bytes)
             logger.warning(
-                f"MAC MISMATCH: {ipmi.device_name}:{ipmi.interface_name} "
-                f"expected {expected_mac} on {ipmi.cable_peer_switch}:{ipmi.cable_peer_port}, "
-                f"but found {actual_mac}"
+                "MAC MISMATCH: %s:%s expected %s on %s:%s, but found %s",
+                ipmi.device_name,
+                ipmi.interface_name,
+                expected_mac,
+                ipmi.cable_peer_switch,
+                ipmi.cable_peer_port,
+                actual_mac,
             )
             return CorrelationResult(
                 mac=expected_mac,
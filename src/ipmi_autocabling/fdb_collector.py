@@ -1,15 +1,48 @@
 """FDB/MAC table collector via SNMP."""
 
+import asyncio
 import logging
+import threading
+import warnings
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Optional
 
 from .config import Config
-from .mac_utils import normalize_mac, oid_suffix_to_mac
+from .mac_utils import mac_to_bytes
 
 logger = logging.getLogger(__name__)
 
+# pysnmp is optional and noisy on import, so it is imported once here
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        from pysnmp.hlapi import (
+            CommunityData,
+            ContextData,
+            ObjectIdentity,
+            ObjectType,
+            SnmpEngine,
+            UdpTransportTarget,
+            bulkCmd,
+        )
+        from pysnmp.hlapi.asyncio import SnmpEngine as AsyncSnmpEngine
+        from pysnmp.hlapi.asyncio import UdpTransportTarget as AsyncUdpTransportTarget
+        from pysnmp.hlapi.asyncio import bulkCmd as asyncBulkCmd
+        from pysnmp.proto.rfc1905 import EndOfMibView
+    PYSNMP_AVAILABLE = True
+except ImportError:
+    PYSNMP_AVAILABLE = False
+
+# orjson is optional; fall back to stdlib json (both accept bytes)
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 # SNMP OIDs for FDB collection
 # dot1dTpFdbAddress - MAC address table (bridge MIB)
 DOT1D_TP_FDB_ADDRESS = "1.3.6.1.2.1.17.4.3.1.1"
@@ -27,12 +60,20 @@ IF_NAME = "1.3.6.1.2.1.31.1.1.1.1"
 IF_DESCR = "1.3.6.1.2.1.2.2.1.2"
 IF_ALIAS = "1.3.6.1.2.1.31.1.1.1.18"
 
+# Number of sub-identifiers in each walked base OID (index suffix starts here)
+DOT1D_TP_FDB_PORT_LEN = len(DOT1D_TP_FDB_PORT.split("."))
+DOT1Q_TP_FDB_PORT_LEN = len(DOT1Q_TP_FDB_PORT.split("."))
+HW_MAC_FWD_PORT_LEN = len(HW_MAC_FWD_PORT.split("."))
+
+# FDB MIBs in default fallback order (Huawei first, most accurate for Huawei switches)
+FDB_MIB_ORDER = ("huawei", "q_bridge", "bridge")
 
-@dataclass
+@dataclass(slots=True)
 class FDBEntry:
     """Single FDB entry."""
 
-    mac: str  # normalized MAC
+    # Raw 6-byte MAC, used as a compact lookup key; see mac_utils.mac_to_str()
+    mac: bytes
     switch_name: str
     switch_ip: str
     port_name: str
@@ -50,21 +91,67 @@ class FDBCollector:
 
     def __init__(self, config: Config):
         self.config = config
-        self._pysnmp_available = False
-        self._snmp_engine = None
-        try:
-            import warnings
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                from pysnmp.hlapi import SnmpEngine
-            self._pysnmp_available = True
-            self._snmp_engine = SnmpEngine()
-        except ImportError:
+        self._pysnmp_available = PYSNMP_AVAILABLE
+        # SnmpEngine is not thread-safe, so each worker thread gets its own
+        self._local = threading.local()
+        # FDB MIB: (walk OID, parser), keyed by name from FDB_MIB_ORDER
+        self._fdb_mibs = {
+            "huawei": (HW_MAC_FWD_PORT, self._parse_huawei_fdb),
+            "q_bridge": (DOT1Q_TP_FDB_PORT, self._parse_q_bridge_fdb),
+            "bridge": (DOT1D_TP_FDB_PORT, self._parse_bridge_fdb),
+        }
+        # Last MIB that returned entries, per switch name; tried first next time
+        self._preferred_mib: dict[str, str] = {}
+        if not PYSNMP_AVAILABLE:
             logger.warning(
                 "pysnmp not installed. FDB collection will use mock data. "
                 "Install with: pip install pysnmp"
             )
 
+    def _get_snmp_engine(self):
+        """Get SNMP engine for the current thread."""
+        engine = getattr(self._local, "snmp_engine", None)
+        if engine is None:
+            engine = SnmpEngine()
+            self._local.snmp_engine = engine
+        return engine
+
+    def _mib_order(self, switch_name: str) -> list[str]:
+        """FDB MIBs to try for a switch, last successful one first."""
+        preferred = self._preferred_mib.get(switch_name)
+        if preferred is None:
+            return list(FDB_MIB_ORDER)
+        return [preferred] + [mib for mib in FDB_MIB_ORDER if mib != preferred]
+
+    def collect_fdb_many(
+        self, switches: list[tuple[str, str]]
+    ) -> dict[str, list[FDBEntry]]:
+        """
+        Collect FDB entries from several switches concurrently.
+
+        Uses a thread pool, or a single asyncio event loop when
+        SNMP_ASYNC is enabled.
+
+        Args:
+            switches: list of (switch_name, switch_ip) tuples
+
+        Returns dict mapping switch_name to list of FDBEntry,
+        in the same order as switches.
+        """
+        if not switches:
+            return {}
+
+        if self.config.snmp_async:
+            return asyncio.run(self.collect_fdb_many_async(switches))
+
+        max_workers = max(1, min(self.config.fdb_workers, len(switches)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                (switch_name, executor.submit(self.collect_fdb, switch_name, switch_ip))
+                for switch_name, switch_ip in switches
+            ]
+            return {switch_name: future.result() for switch_name, future in futures}
+
     def collect_fdb(
         self, switch_name: str, switch_ip: str
     ) -> list[FDBEntry]:
@@ -74,54 +161,38 @@ class FDBCollector:
         Returns list of FDBEntry objects.
         """
         if not self._pysnmp_available:
-            logger.warning(f"Skipping FDB collection for {switch_name}: pysnmp not available")
+            logger.warning("Skipping FDB collection for %s: pysnmp not available", switch_name)
             return []
 
         if not switch_ip:
-            logger.warning(f"Skipping FDB collection for {switch_name}: no IP address")
+            logger.warning("Skipping FDB collection for %s: no IP address", switch_name)
             return []
 
-        logger.info(f"Collecting FDB from {switch_name} ({switch_ip})")
+        logger.info("Collecting FDB from %s (%s)", switch_name, switch_ip)
 
         try:
             if_names = self._get_interface_names(switch_ip)
 
-            # Try Huawei MIB first (most accurate for Huawei switches)
-            entries = self._collect_huawei_fdb(switch_name, switch_ip, if_names)
+            # Try the MIB that worked last time first, then fall back to the others
+            entries = []
+            for mib in self._mib_order(switch_name):
+                oid, parse = self._fdb_mibs[mib]
+                entries = parse(switch_name, switch_ip, if_names, self._walk(switch_ip, oid))
+                if entries:
+                    self._preferred_mib[switch_name] = mib
+                    break
 
-            # Fallback to Q-Bridge MIB
-            if not entries:
-                entries = self._collect_q_bridge_fdb(switch_name, switch_ip, if_names)
-
-            # Fallback to standard Bridge MIB
-            if not entries:
-                entries = self._collect_bridge_fdb(switch_name, switch_ip, if_names)
-
-            logger.info(f"Collected {len(entries)} FDB entries from {switch_name}")
+            logger.info("Collected %s FDB entries from %s", len(entries), switch_name)
             return entries
 
         except Exception as e:
-            logger.error(f"Failed to collect FDB from {switch_name}: {e}")
+            logger.error("Failed to collect FDB from %s: %s", switch_name, e)
             return []
 
-    def _get_interface_names(self, switch_ip: str) -> dict[int, str]:
-        """Get interface names by ifIndex."""
-        import warnings
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            from pysnmp.hlapi import (
-                CommunityData,
-                ContextData,
-                ObjectIdentity,
-                ObjectType,
-                UdpTransportTarget,
-                nextCmd,
-            )
-
-        if_names = {}
-
-        for error_indication, error_status, error_index, var_binds in nextCmd(
-            self._snmp_engine,
+    def _walk(self, switch_ip: str, oid: str) -> Iterator:
+        """Walk an SNMP subtree with GETBULK, yielding var-binds."""
+        for error_indication, error_status, error_index, var_binds in bulkCmd(
+            self._get_snmp_engine(),
             CommunityData(self.config.snmp_community),
             UdpTransportTarget(
                 (switch_ip, 161),
@@ -129,213 +200,281 @@ class FDBCollector:
                 retries=self.config.snmp_retries,
             ),
             ContextData(),
-            ObjectType(ObjectIdentity(IF_NAME)),
+            0,
+            self.config.snmp_max_repetitions,
+            # Built per walk: pysnmp resolves ObjectType in place against the
+            # engine's MIB, so instances must not be shared between engines
+            ObjectType(ObjectIdentity(oid)),
             lexicographicMode=False,
         ):
-            if error_indication or error_status:
-                break
+            if error_indication:
+                logger.debug("SNMP error: %s", error_indication)
+                return
+
+            if error_status:
+                logger.debug("SNMP error status: %s", error_status)
+                return
 
-            for var_bind in var_binds:
-                oid = str(var_bind[0])
-                value = str(var_bind[1])
-                if_index = int(oid.split(".")[-1])
-                if_names[if_index] = value
+            yield from var_binds
 
-        return if_names
+    def _get_interface_names(self, switch_ip: str) -> dict[int, str]:
+        """Get interface names by ifIndex."""
+        return self._parse_interface_names(self._walk(switch_ip, IF_NAME))
+
+    async def collect_fdb_many_async(
+        self, switches: list[tuple[str, str]]
+    ) -> dict[str, list[FDBEntry]]:
+        """
+        Collect FDB entries from several switches on a single asyncio event loop.
+
+        All SNMP exchanges share one engine and are multiplexed on the loop
+        instead of using a thread per switch; at most fdb_workers switches
+        are polled at once.
 
-    def _collect_huawei_fdb(
-        self, switch_name: str, switch_ip: str, if_names: dict[int, str]
+        Args:
+            switches: list of (switch_name, switch_ip) tuples
+
+        Returns dict mapping switch_name to list of FDBEntry,
+        in the same order as switches.
+        """
+        snmp_engine = self._create_async_snmp_engine() if self._pysnmp_available else None
+        semaphore = asyncio.Semaphore(max(1, self.config.fdb_workers))
+
+        async def collect(switch_name: str, switch_ip: str) -> list[FDBEntry]:
+            async with semaphore:
+                return await self.collect_fdb_async(switch_name, switch_ip, snmp_engine)
+
+        try:
+            results = await asyncio.gather(*[
+                collect(switch_name, switch_ip) for switch_name, switch_ip in switches
+            ])
+        finally:
+            if snmp_engine is not None:
+                self._close_async_snmp_engine(snmp_engine)
+        return {
+            switch_name: entries
+            for (switch_name, _), entries in zip(switches, results)
+        }
+
+    async def collect_fdb_async(
+        self, switch_name: str, switch_ip: str, snmp_engine=None
     ) -> list[FDBEntry]:
-        """Collect FDB using Huawei hwMacFwdPort MIB."""
-        import warnings
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            from pysnmp.hlapi import (
-                CommunityData,
-                ContextData,
-                ObjectIdentity,
-                ObjectType,
-                UdpTransportTarget,
-                nextCmd,
+        """
+        Collect FDB entries from a switch using the pysnmp asyncio API.
+
+        Same MIB fallback order as collect_fdb().
+        """
+        if not self._pysnmp_available:
+            logger.warning("Skipping FDB collection for %s: pysnmp not available", switch_name)
+            return []
+
+        if not switch_ip:
+            logger.warning("Skipping FDB collection for %s: no IP address", switch_name)
+            return []
+
+        logger.info("Collecting FDB from %s (%s)", switch_name, switch_ip)
+
+        own_engine = snmp_engine is None
+        if own_engine:
+            snmp_engine = self._create_async_snmp_engine()
+
+        try:
+            if_names = self._parse_interface_names(
+                await self._async_bulk_walk(snmp_engine, switch_ip, IF_NAME)
             )
 
-        entries = []
+            entries = []
+            for mib in self._mib_order(switch_name):
+                oid, parse = self._fdb_mibs[mib]
+                entries = parse(
+                    switch_name, switch_ip, if_names,
+                    await self._async_bulk_walk(snmp_engine, switch_ip, oid),
+                )
+                if entries:
+                    self._preferred_mib[switch_name] = mib
+                    break
+
+            logger.info("Collected %s FDB entries from %s", len(entries), switch_name)
+            return entries
+
+        except Exception as e:
+            logger.error("Failed to collect FDB from %s: %s", switch_name, e)
+            return []
+
+        finally:
+            if own_engine:
+                self._close_async_snmp_engine(snmp_engine)
+
+    def _create_async_snmp_engine(self):
+        """Create SNMP engine for the asyncio API."""
+        return AsyncSnmpEngine()
+
+    @staticmethod
+    def _close_async_snmp_engine(snmp_engine):
+        """Close the engine's transport dispatcher, releasing its UDP sockets."""
+        dispatcher = snmp_engine.transportDispatcher
+        if dispatcher is not None:
+            dispatcher.closeDispatcher()
+
+    async def _async_bulk_walk(self, snmp_engine, switch_ip: str, oid: str) -> list:
+        """Walk an SNMP subtree with asyncio GETBULK requests, returning var-binds."""
+        base_oid = tuple(int(p) for p in oid.split("."))
+        base_len = len(base_oid)
+        community = CommunityData(self.config.snmp_community)
+        target = AsyncUdpTransportTarget(
+            (switch_ip, 161),
+            timeout=self.config.snmp_timeout,
+            retries=self.config.snmp_retries,
+        )
+
+        result = []
+        last_oid = base_oid
+        next_object = ObjectType(ObjectIdentity(oid))
+
+        while True:
+            error_indication, error_status, error_index, var_bind_table = await asyncBulkCmd(
+                snmp_engine,
+                community,
+                target,
+                ContextData(),
+                0,
+                self.config.snmp_max_repetitions,
+                next_object,
+            )
 
-        for error_indication, error_status, error_index, var_binds in nextCmd(
-            self._snmp_engine,
-            CommunityData(self.config.snmp_community),
-            UdpTransportTarget(
-                (switch_ip, 161),
-                timeout=self.config.snmp_timeout,
-                retries=self.config.snmp_retries,
-            ),
-            ContextData(),
-            ObjectType(ObjectIdentity(HW_MAC_FWD_PORT)),
-            lexicographicMode=False,
-        ):
             if error_indication:
-                logger.debug(f"SNMP error: {error_indication}")
-                break
+                logger.debug("SNMP error: %s", error_indication)
+                return result
 
             if error_status:
-                logger.debug(f"SNMP error status: {error_status}")
-                break
-
-            for var_bind in var_binds:
-                oid = str(var_bind[0])
-                port_index = int(var_bind[1])
-
-                # OID format: HW_MAC_FWD_PORT.mac(6).vlan.0
-                # Example: 1.3.6.1.4.1.2011.5.25.42.2.1.3.1.4.0.224.237.219.143.82.10.0
-                oid_parts = oid.split(".")
-                base_len = len(HW_MAC_FWD_PORT.split("."))
-
-                # Need at least 8 more parts: 6 for MAC + 1 for VLAN + 1 trailing 0
-                if len(oid_parts) < base_len + 8:
-                    continue
-
-                mac_octets = oid_parts[base_len : base_len + 6]
-                vlan = int(oid_parts[base_len + 6])
-
-                try:
-                    mac = ":".join(f"{int(o):02x}" for o in mac_octets)
-                    port_name = if_names.get(port_index, f"port{port_index}")
-
-                    entries.append(FDBEntry(
-                        mac=mac,
-                        switch_name=switch_name,
-                        switch_ip=switch_ip,
-                        port_name=port_name,
-                        port_index=port_index,
-                        vlan=vlan,
-                    ))
-                except ValueError as e:
-                    logger.debug(f"Failed to parse MAC from OID: {e}")
+                logger.debug("SNMP error status: %s", error_status)
+                return result
+
+            if not var_bind_table:
+                return result
+
+            for var_binds in var_bind_table:
+                for var_bind in var_binds:
+                    var_oid = var_bind[0].asTuple()
+                    if var_oid[:base_len] != base_oid or isinstance(var_bind[1], EndOfMibView):
+                        return result
+                    # Guard against agents that do not advance the OID
+                    if var_oid <= last_oid:
+                        return result
+                    result.append(var_bind)
+                    last_oid = var_oid
+
+            next_object = ObjectType(ObjectIdentity(last_oid))
+
+    @staticmethod
+    def _parse_interface_names(var_binds: Iterable) -> dict[int, str]:
+        """Build ifIndex -> ifName map from ifName var-binds."""
+        if_names = {}
 
-        if entries:
-            logger.debug(f"Collected {len(entries)} entries using Huawei MIB")
+        for var_bind in var_binds:
+            if_index = var_bind[0].asTuple()[-1]
+            if_names[if_index] = str(var_bind[1])
 
-        return entries
+        return if_names
 
-    def _collect_q_bridge_fdb(
-        self, switch_name: str, switch_ip: str, if_names: dict[int, str]
+    @staticmethod
+    def _parse_huawei_fdb(
+        switch_name: str, switch_ip: str, if_names: dict[int, str], var_binds: Iterable
     ) -> list[FDBEntry]:
-        """Collect FDB using Q-Bridge MIB (VLAN-aware)."""
-        import warnings
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            from pysnmp.hlapi import (
-                CommunityData,
-                ContextData,
-                ObjectIdentity,
-                ObjectType,
-                UdpTransportTarget,
-                nextCmd,
-            )
-
+        """Build FDB entries from Huawei hwMacFwdPort var-binds."""
         entries = []
 
-        for error_indication, error_status, error_index, var_binds in nextCmd(
-            self._snmp_engine,
-            CommunityData(self.config.snmp_community),
-            UdpTransportTarget(
-                (switch_ip, 161),
-                timeout=self.config.snmp_timeout,
-                retries=self.config.snmp_retries,
-            ),
-            ContextData(),
-            ObjectType(ObjectIdentity(DOT1Q_TP_FDB_PORT)),
-            lexicographicMode=False,
-        ):
-            if error_indication:
-                logger.debug(f"SNMP error: {error_indication}")
-                break
+        for var_bind in var_binds:
+            oid = var_bind[0].asTuple()
+            port_index = int(var_bind[1])
 
-            if error_status:
-                logger.debug(f"SNMP error status: {error_status}")
-                break
-
-            for var_bind in var_binds:
-                oid = str(var_bind[0])
-                port_index = int(var_bind[1])
-
-                # OID format: DOT1Q_TP_FDB_PORT.vlan.mac_octets
-                oid_parts = oid.split(".")
-                base_len = len(DOT1Q_TP_FDB_PORT.split("."))
-
-                if len(oid_parts) < base_len + 7:
-                    continue
-
-                vlan = int(oid_parts[base_len])
-                mac_suffix = ".".join(oid_parts[base_len + 1 : base_len + 7])
-
-                try:
-                    mac = oid_suffix_to_mac(mac_suffix)
-                    port_name = if_names.get(port_index, f"port{port_index}")
-
-                    entries.append(FDBEntry(
-                        mac=mac,
-                        switch_name=switch_name,
-                        switch_ip=switch_ip,
-                        port_name=port_name,
-                        port_index=port_index,
-                        vlan=vlan,
-                    ))
-                except ValueError as e:
-                    logger.debug(f"Failed to parse MAC from OID: {e}")
+            # OID format: HW_MAC_FWD_PORT.mac(6).vlan.0
+            # Example: 1.3.6.1.4.1.2011.5.25.42.2.1.3.1.4.0.224.237.219.143.82.10.0
+            base_len = HW_MAC_FWD_PORT_LEN
+
+            # Need at least 8 more parts: 6 for MAC + 1 for VLAN + 1 trailing 0
+            if len(oid) < base_len + 8:
+                continue
+
+            vlan = oid[base_len + 6]
+
+            try:
+                mac = bytes(oid[base_len : base_len + 6])
+                port_name = if_names.get(port_index, f"port{port_index}")
+
+                entries.append(FDBEntry(
+                    mac=mac,
+                    switch_name=switch_name,
+                    switch_ip=switch_ip,
+                    port_name=port_name,
+                    port_index=port_index,
+                    vlan=vlan,
+                ))
+            except ValueError as e:
+                logger.debug("Failed to parse MAC from OID: %s", e)
+
+        if entries:
+            logger.debug("Collected %s entries using Huawei MIB", len(entries))
 
         return entries
 
-    def _collect_bridge_fdb(
-        self, switch_name: str, switch_ip: str, if_names: dict[int, str]
+    @staticmethod
+    def _parse_q_bridge_fdb(
+        switch_name: str, switch_ip: str, if_names: dict[int, str], var_binds: Iterable
     ) -> list[FDBEntry]:
-        """Collect FDB using Bridge MIB (non-VLAN aware)."""
-        import warnings
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            from pysnmp.hlapi import (
-                CommunityData,
-                ContextData,
-                ObjectIdentity,
-                ObjectType,
-                UdpTransportTarget,
-                nextCmd,
-            )
+        """Build FDB entries from Q-Bridge dot1qTpFdbPort var-binds."""
+        entries = []
 
-        mac_to_port = {}
+        for var_bind in var_binds:
+            oid = var_bind[0].asTuple()
+            port_index = int(var_bind[1])
 
-        for error_indication, error_status, error_index, var_binds in nextCmd(
-            self._snmp_engine,
-            CommunityData(self.config.snmp_community),
-            UdpTransportTarget(
-                (switch_ip, 161),
-                timeout=self.config.snmp_timeout,
-                retries=self.config.snmp_retries,
-            ),
-            ContextData(),
-            ObjectType(ObjectIdentity(DOT1D_TP_FDB_PORT)),
-            lexicographicMode=False,
-        ):
-            if error_indication or error_status:
-                break
+            # OID format: DOT1Q_TP_FDB_PORT.vlan.mac_octets
+            base_len = DOT1Q_TP_FDB_PORT_LEN
+
+            if len(oid) < base_len + 7:
+                continue
+
+            vlan = oid[base_len]
 
-            for var_bind in var_binds:
-                oid = str(var_bind[0])
-                port_index = int(var_bind[1])
+            try:
+                mac = bytes(oid[base_len + 1 : base_len + 7])
+                port_name = if_names.get(port_index, f"port{port_index}")
 
-                oid_parts = oid.split(".")
-                base_len = len(DOT1D_TP_FDB_PORT.split("."))
+                entries.append(FDBEntry(
+                    mac=mac,
+                    switch_name=switch_name,
+                    switch_ip=switch_ip,
+                    port_name=port_name,
+                    port_index=port_index,
+                    vlan=vlan,
+                ))
+            except ValueError as e:
+                logger.debug("Failed to parse MAC from OID: %s", e)
 
-                if len(oid_parts) < base_len + 6:
-                    continue
+        return entries
+
+    @staticmethod
+    def _parse_bridge_fdb(
+        switch_name: str, switch_ip: str, if_names: dict[int, str], var_binds: Iterable
+    ) -> list[FDBEntry]:
+        """Build FDB entries from Bridge dot1dTpFdbPort var-binds."""
+        mac_to_port: dict[bytes, int] = {}
 
-                mac_suffix = ".".join(oid_parts[base_len : base_len + 6])
+        for var_bind in var_binds:
+            oid = var_bind[0].asTuple()
+            port_index = int(var_bind[1])
 
-                try:
-                    mac = oid_suffix_to_mac(mac_suffix)
-                    mac_to_port[mac] = port_index
-                except ValueError:
-                    continue
+            base_len = DOT1D_TP_FDB_PORT_LEN
+
+            if len(oid) < base_len + 6:
+                continue
+
+            try:
+                mac = bytes(oid[base_len : base_len + 6])
+                mac_to_port[mac] = port_index
+            except ValueError:
+                continue
 
         entries = []
         for mac, port_index in mac_to_port.items():
@@ -360,6 +499,7 @@ class MockFDBCollector:
 
         Args:
             fdb_data: dict mapping switch_name to list of FDBEntry
+                (MACs as 6-byte bytes, see mac_utils.mac_to_bytes)
         """
         self.fdb_data = fdb_data
 
@@ -367,6 +507,15 @@ class MockFDBCollector:
         """Return mock FDB entries for switch."""
         return self.fdb_data.get(switch_name, [])
 
+    def collect_fdb_many(
+        self, switches: list[tuple[str, str]]
+    ) -> dict[str, list[FDBEntry]]:
+        """Return mock FDB entries for several switches."""
+        return {
+            switch_name: self.collect_fdb(switch_name, switch_ip)
+            for switch_name, switch_ip in switches
+        }
+
 
 def load_fdb_snapshot(path: str) -> dict[str, list[FDBEntry]]:
     """
@@ -381,17 +530,15 @@ def load_fdb_snapshot(path: str) -> dict[str, list[FDBEntry]]:
         ...
     }
     """
-    import json
-
-    with open(path) as f:
-        data = json.load(f)
+    with open(path, "rb") as f:
+        data = json_loads(f.read())
 
     result = {}
     for switch_name, entries in data.items():
         result[switch_name] = []
         for entry in entries:
             result[switch_name].append(FDBEntry(
-                mac=normalize_mac(entry["mac"]),
+                mac=mac_to_bytes(entry["mac"]),
                 switch_name=switch_name,
                 switch_ip="",
                 port_name=entry.get("port", "unknown"),
@@ -400,3 +547,30 @@ def load_fdb_snapshot(path: str) -> dict[str, list[FDBEntry]]:
             ))
 
     return result
+
+
+def index_fdb_by_mac(
+    fdb_by_switch: dict[str, list[FDBEntry]],
+) -> dict[bytes, list[FDBEntry]]:
+    """Index per-switch FDB entries by raw 6-byte MAC."""
+    result: dict[bytes, list[FDBEntry]] = defaultdict(list)
+    for entries in fdb_by_switch.values():
+        for entry in entries:
+            result[entry.mac].append(entry)
+    return dict(result)
+
+
+def index_fdb_by_port(
+    fdb_by_switch: dict[str, list[FDBEntry]],
+) -> dict[str, dict[str, bytes]]:
+    """
+    Map switch name -> port name -> MAC seen on that port.
+
+    Entries are walked in collection order, so when a port carries several
+    MACs the last collected one wins.
+    """
+    result: dict[str, dict[str, bytes]] = {}
+    for entries in fdb_by_switch.values():
+        for entry in entries:
+            result.setdefault(entry.switch_name, {})[entry.port_name] = entry.mac
+    return result
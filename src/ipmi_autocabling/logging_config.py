@@ -1,92 +1,182 @@
 """Logging configuration."""
 
-import json
 import logging
 import sys
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Optional
+
+# orjson is optional; fall back to stdlib json
+try:
+    import orjson
+
+    def json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+except ImportError:
+    from json import dumps as json_dumps
+
+# Max delay before buffered log lines reach stdout (seconds)
+LOG_FLUSH_INTERVAL = 0.2
+
+# Record attributes (passed via extra=) copied into structured output
+_EXTRA_FIELDS = ("mac", "device", "interface", "switch", "port", "status")
 
 
 class JSONFormatter(logging.Formatter):
     """JSON log formatter for structured logging."""
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Whole-second prefix of the last timestamp, rebuilt once per second
+        self._last_sec: Optional[int] = None
+        self._last_sec_str = ""
+
+    def _timestamp(self, created: float) -> str:
+        sec = int(created)
+        if sec != self._last_sec:
+            self._last_sec = sec
+            self._last_sec_str = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+        return f"{self._last_sec_str}.{int((created - sec) * 1e6):06d}Z"
+
     def format(self, record: logging.LogRecord) -> str:
         log_data: dict[str, Any] = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": self._timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
         }
 
-        if hasattr(record, "mac"):
-            log_data["mac"] = record.mac
-        if hasattr(record, "device"):
-            log_data["device"] = record.device
-        if hasattr(record, "interface"):
-            log_data["interface"] = record.interface
-        if hasattr(record, "switch"):
-            log_data["switch"] = record.switch
-        if hasattr(record, "port"):
-            log_data["port"] = record.port
-        if hasattr(record, "status"):
-            log_data["status"] = record.status
+        record_dict = record.__dict__
+        for name in _EXTRA_FIELDS:
+            if name in record_dict:
+                log_data[name] = record_dict[name]
 
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
 
-        return json.dumps(log_data)
+        return json_dumps(log_data)
 
 
 class KeyValueFormatter(logging.Formatter):
     """Key-value log formatter."""
 
     def format(self, record: logging.LogRecord) -> str:
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+            timespec="seconds"
+        )
         parts = [
             f"ts={timestamp}",
             f"level={record.levelname}",
             f"msg=\"{record.getMessage()}\"",
         ]
 
-        if hasattr(record, "mac"):
-            parts.append(f"mac={record.mac}")
-        if hasattr(record, "device"):
-            parts.append(f"device={record.device}")
-        if hasattr(record, "interface"):
-            parts.append(f"interface={record.interface}")
-        if hasattr(record, "switch"):
-            parts.append(f"switch={record.switch}")
-        if hasattr(record, "port"):
-            parts.append(f"port={record.port}")
-        if hasattr(record, "status"):
-            parts.append(f"status={record.status}")
+        record_dict = record.__dict__
+        for name in _EXTRA_FIELDS:
+            if name in record_dict:
+                value = record_dict[name]
+                if isinstance(value, str) and " " in value:
+                    parts.append(f'{name}="{value}"')
+                else:
+                    parts.append(f"{name}={value}")
 
         return " ".join(parts)
 
 
+class BufferedStreamHandler(logging.StreamHandler):
+    """
+    Stream handler that does not flush after every record.
+
+    Lines accumulate in the stream buffer and are flushed by a background
+    thread every flush_interval seconds, so a burst of records costs a few
+    write() syscalls instead of one per line. logging.shutdown() flushes
+    the handler at interpreter exit.
+    """
+
+    def __init__(self, stream=None, flush_interval: float = LOG_FLUSH_INTERVAL):
+        super().__init__(stream)
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_periodically,
+            args=(flush_interval,),
+            name="log-flusher",
+            daemon=True,
+        )
+        self._flusher.start()
+
+    def _flush_periodically(self, interval: float):
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            msg = self.format(record)
+            self.stream.write(msg + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+        super().close()
+
+
+def _buffered_stdout():
+    """
+    Return sys.stdout with line buffering turned off.
+
+    Logs go through the same file object as print(), so both stay in
+    order; only the flush policy changes (a terminal flushes per line).
+    """
+    reconfigure = getattr(sys.stdout, "reconfigure", None)
+    if reconfigure is not None and sys.stdout.line_buffering:
+        reconfigure(line_buffering=False)
+    return sys.stdout
+
+
+# Formatter class per --log-format value; anything else gets the text formatter
+_FORMATTERS: dict[str, type[logging.Formatter]] = {
+    "json": JSONFormatter,
+    "kv": KeyValueFormatter,
+}
+
+_TEXT_FORMATTER = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+
+_LEVELS = logging.getLevelNamesMapping()
+
+
 def setup_logging(
     level: str = "INFO",
     format_type: str = "text",  # "text", "json", "kv"
 ):
-    """Configure logging for the application."""
+    """
+    Configure logging for the application.
+
+    Repeated calls with the same level and format keep the existing handler.
+    """
     root_logger = logging.getLogger()
-    root_logger.setLevel(getattr(logging, level.upper()))
+    settings = (level.upper(), format_type)
+    if getattr(root_logger, "_autocabling_settings", None) == settings and any(
+        isinstance(h, BufferedStreamHandler) for h in root_logger.handlers
+    ):
+        return
+
+    root_logger.setLevel(_LEVELS[settings[0]])
 
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
+        if isinstance(handler, BufferedStreamHandler):
+            handler.close()
 
-    handler = logging.StreamHandler(sys.stdout)
-
-    if format_type == "json":
-        handler.setFormatter(JSONFormatter())
-    elif format_type == "kv":
-        handler.setFormatter(KeyValueFormatter())
-    else:
-        handler.setFormatter(
-            logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
-        )
+    handler = BufferedStreamHandler(_buffered_stdout())
+    formatter_cls = _FORMATTERS.get(format_type)
+    handler.setFormatter(formatter_cls() if formatter_cls else _TEXT_FORMATTER)
 
     root_logger.addHandler(handler)
+    root_logger._autocabling_settings = settings  # type: ignore[attr-defined]
 
     logging.getLogger("urllib3").setLevel(logging.WARNING)
     logging.getLogger("requests").setLevel(logging.WARNING)
@@ -1,6 +1,6 @@
 """MAC address utilities."""
 
-import re
+_MAC_STRIP = str.maketrans("", "", ":-.")
 
 
 def normalize_mac(mac: str) -> str:
@@ -19,15 +19,44 @@ def normalize_mac(mac: str) -> str:
     if not mac:
         return ""
 
-    mac_clean = re.sub(r"[:\-\.]", "", mac.strip().lower())
+    return mac_to_bytes(mac).hex(":")
 
-    if len(mac_clean) != 12:
+
+def mac_to_bytes(mac: str) -> bytes:
+    """
+    Convert MAC address in any supported format to its 6 raw bytes.
+
+    Example: AA:BB:CC:DD:EE:FF -> bytes.fromhex("aabbccddeeff")
+    """
+    if not mac:
+        return b""
+
+    # bytes.fromhex() accepts either case, so no lower() pass is needed
+    s = mac.strip().translate(_MAC_STRIP)
+
+    # Both checks are needed: "aabb ccdd eeff" decodes to 6 bytes but is
+    # 14 characters long, "aabbcc dd ee" is 12 characters but 5 bytes
+    if len(s) != 12:
         raise ValueError(f"Invalid MAC address: {mac}")
 
-    if not re.match(r"^[0-9a-f]{12}$", mac_clean):
+    try:
+        raw = bytes.fromhex(s)
+    except ValueError:
+        raise ValueError(f"Invalid MAC address: {mac}") from None
+
+    if len(raw) != 6:
         raise ValueError(f"Invalid MAC address: {mac}")
 
-    return ":".join(mac_clean[i : i + 2] for i in range(0, 12, 2))
+    return raw
+
+
+def mac_to_str(mac: bytes) -> str:
+    """
+    Convert raw MAC bytes to normalized string form (for display and storage).
+
+    Example: bytes.fromhex("aabbccddeeff") -> aa:bb:cc:dd:ee:ff
+    """
+    return mac.hex(":")
 
 
 def mac_to_oid_suffix(mac: str) -> str:
@@ -36,9 +65,7 @@ def mac_to_oid_suffix(mac: str) -> str:
 
     Example: aa:bb:cc:dd:ee:ff -> 170.187.204.221.238.255
     """
-    normalized = normalize_mac(mac)
-    octets = normalized.split(":")
-    return ".".join(str(int(octet, 16)) for octet in octets)
+    return ".".join(map(str, mac_to_bytes(mac)))
 
 
 def oid_suffix_to_mac(oid_suffix: str) -> str:
@@ -51,5 +78,4 @@ def oid_suffix_to_mac(oid_suffix: str) -> str:
     if len(parts) != 6:
         raise ValueError(f"Invalid OID suffix: {oid_suffix}")
 
-    octets = [f"{int(p):02x}" for p in parts]
-    return ":".join(octets)
+    return bytes(int(p) for p in parts).hex(":")
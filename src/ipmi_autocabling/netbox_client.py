@@ -1,16 +1,47 @@
 """NetBox API client for IPMI Auto-Cabling."""
 
 import logging
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .config import Config
+from .mac_utils import normalize_mac
+
+# orjson is optional; fall back to stdlib json (both accept bytes)
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 logger = logging.getLogger(__name__)
 
+# Query parameters: dict, or list of (key, value) pairs for repeated keys
+QueryParams = dict | list[tuple[str, object]]
+
+# Max object IDs per bulk filtered request (keeps URLs short)
+BULK_ID_CHUNK = 50
+
+# Page size for bulk requests (NetBox MAX_PAGE_SIZE default)
+BULK_PAGE_LIMIT = 1000
+
+# Keep-alive connections per host (covers concurrent site/bulk queries)
+HTTP_POOL_SIZE = 64
+
+# Retry transient NetBox errors on idempotent requests (POST is not retried)
+HTTP_RETRY = Retry(
+    total=3,
+    backoff_factor=0.3,
+    status_forcelist=(429, 500, 502, 503, 504),
+    # Отдаём последний ответ, чтобы raise_for_status() бросал HTTPError, а не RetryError
+    raise_on_status=False,
+)
+
 # Interface name mappings: (full_name, short_name) pairs
 # Order matters: longer prefixes first to avoid partial matches
 INTERFACE_NAME_MAP = [
@@ -51,7 +82,7 @@ def generate_interface_name_variants(name: str) -> list[str]:
     return variants
 
 
-@dataclass
+@dataclass(slots=True)
 class IPMIInterface:
     """IPMI interface data from NetBox."""
 
@@ -59,7 +90,7 @@ class IPMIInterface:
     device_name: str
     interface_id: int
     interface_name: str
-    mac_address: str
+    mac_address: str  # normalized: aa:bb:cc:dd:ee:ff
     has_cable: bool
     site: Optional[str] = None
     rack: Optional[str] = None
@@ -68,7 +99,7 @@ class IPMIInterface:
     cable_peer_port: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class SwitchInfo:
     """Switch information from NetBox."""
 
@@ -78,7 +109,7 @@ class SwitchInfo:
     site: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class SwitchInterface:
     """Switch interface from NetBox."""
 
@@ -105,11 +136,47 @@ class NetBoxClient:
         })
         self.session.verify = config.netbox_verify_ssl
 
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=HTTP_RETRY,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Raw interface data per switch ID, kept until clear_cache()
+        self._iface_cache: dict[int, list[dict]] = {}
+        # Same interfaces keyed by lowercase name, built on first name lookup
+        self._iface_name_index: dict[int, dict[str, dict]] = {}
+
+    def clear_cache(self):
+        """Drop cached NetBox data (call at the start of each run)."""
+        self._iface_cache.clear()
+        self._iface_name_index.clear()
+
+    def _interfaces_for_switch(self, switch_id: int) -> list[dict]:
+        """Get all interfaces of a switch (cached)."""
+        if switch_id not in self._iface_cache:
+            self._iface_cache[switch_id] = self._get_all(
+                "dcim/interfaces/", params={"device_id": switch_id}
+            )
+        return self._iface_cache[switch_id]
+
+    def _interfaces_by_name(self, switch_id: int) -> dict[str, dict]:
+        """Get interfaces of a switch keyed by lowercase name (cached)."""
+        index = self._iface_name_index.get(switch_id)
+        if index is None:
+            index = {}
+            for iface in self._interfaces_for_switch(switch_id):
+                index.setdefault(iface.get("name", "").lower(), iface)
+            self._iface_name_index[switch_id] = index
+        return index
+
     def _get(self, endpoint: str, params: Optional[dict] = None) -> dict:
         """Execute GET request to API."""
         response = self.session.get(f"{self.url}/api/{endpoint}", params=params)
         response.raise_for_status()
-        return response.json()
+        return json_loads(response.content)
 
     def _post(self, endpoint: str, data: dict) -> dict:
         """Execute POST request to API."""
@@ -117,21 +184,44 @@ class NetBoxClient:
         response.raise_for_status()
         return response.json()
 
-    def _get_all(self, endpoint: str, params: Optional[dict] = None) -> list:
-        """Get all results with pagination."""
+    def _iter_all(
+        self, endpoint: str, params: Optional[QueryParams] = None
+    ) -> Iterator[dict]:
+        """Iterate over all results, fetching pages lazily."""
         params = params or {}
-        results = []
         url = f"{self.url}/api/{endpoint}"
 
         while url:
             response = self.session.get(url, params=params)
             response.raise_for_status()
-            data = response.json()
-            results.extend(data.get("results", []))
+            data = json_loads(response.content)
+            yield from data.get("results", [])
             url = data.get("next")
             params = {}
 
-        return results
+    def _get_all(self, endpoint: str, params: Optional[QueryParams] = None) -> list:
+        """Get all results with pagination."""
+        return list(self._iter_all(endpoint, params))
+
+    def _get_by_ids(self, endpoint: str, ids: list[int]) -> dict[int, dict]:
+        """Fetch objects by ID in chunked bulk requests, keyed by ID."""
+        result = {}
+        for i in range(0, len(ids), BULK_ID_CHUNK):
+            params = [("id", obj_id) for obj_id in ids[i : i + BULK_ID_CHUNK]]
+            params.append(("limit", BULK_PAGE_LIMIT))
+            for obj in self._iter_all(endpoint, params=params):
+                result[obj["id"]] = obj
+        return result
+
+    @staticmethod
+    def _has_oob_iface_fields(iface: dict) -> bool:
+        """Check if interface data has every field get_devices_with_oob() reads."""
+        return (
+            "name" in iface
+            and "mac_address" in iface
+            and "cable" in iface
+            and (iface["cable"] is None or "link_peers" in iface)
+        )
 
     def get_devices_with_oob(self) -> list[IPMIInterface]:
         """
@@ -140,36 +230,71 @@ class NetBoxClient:
         Returns list of IPMIInterface objects with MAC addresses.
         """
         # Получаем все устройства у которых есть oob_ip
-        devices = self._get_all("dcim/devices/", params={"has_oob_ip": "true"})
-
-        result = []
-        for device in devices:
-            oob_ip = device.get("oob_ip")
-            if not oob_ip:
-                continue
+        devices = [
+            d
+            for d in self._iter_all(
+                "dcim/devices/",
+                params={"has_oob_ip": "true", "exclude": "config_context"},
+            )
+            if d.get("oob_ip") and d["oob_ip"].get("id")
+        ]
 
-            oob_ip_id = oob_ip.get("id")
-            if not oob_ip_id:
+        # Bulk-загрузка IP адресов и их интерфейсов вместо запроса на каждое устройство
+        ip_by_id = self._get_by_ids(
+            "ipam/ip-addresses/", [d["oob_ip"]["id"] for d in devices]
+        )
+        # Вложенный assigned_object используем как есть, если в нём есть все
+        # нужные поля; остальные интерфейсы догружаем одним bulk-запросом
+        iface_by_id = {}
+        missing_iface_ids = []
+        for ip in ip_by_id.values():
+            assigned_object = ip.get("assigned_object")
+            if not assigned_object or not assigned_object.get("id"):
                 continue
+            if self._has_oob_iface_fields(assigned_object):
+                iface_by_id[assigned_object["id"]] = assigned_object
+            else:
+                missing_iface_ids.append(assigned_object["id"])
+        iface_by_id.update(self._get_by_ids("dcim/interfaces/", missing_iface_ids))
 
-            # Получаем IP адрес чтобы найти интерфейс
-            ip_data = self._get(f"ipam/ip-addresses/{oob_ip_id}/")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        result = []
+        for device in devices:
+            oob_ip = device["oob_ip"]
+            ip_data = ip_by_id.get(oob_ip["id"], {})
             assigned_object = ip_data.get("assigned_object")
 
             if not assigned_object or not assigned_object.get("id"):
                 logger.warning(
-                    f"Device {device.get('name')}: OOB IP not assigned to interface"
+                    "Device %s: OOB IP not assigned to interface", device.get("name")
                 )
                 continue
 
-            # Получаем интерфейс
             interface_id = assigned_object.get("id")
-            iface = self._get(f"dcim/interfaces/{interface_id}/")
+            iface = iface_by_id.get(interface_id)
+            if iface is None:
+                logger.warning(
+                    "Device %s: OOB interface %s not found", device.get("name"), interface_id
+                )
+                continue
 
             mac = iface.get("mac_address")
             if not mac:
                 logger.warning(
-                    f"Device {device.get('name')}: OOB interface {iface.get('name')} has no MAC"
+                    "Device %s: OOB interface %s has no MAC",
+                    device.get("name"),
+                    iface.get("name"),
+                )
+                continue
+
+            try:
+                mac = normalize_mac(mac)
+            except ValueError:
+                logger.warning(
+                    "Device %s: OOB interface %s has invalid MAC %s",
+                    device.get("name"),
+                    iface.get("name"),
+                    mac,
                 )
                 continue
 
@@ -201,30 +326,29 @@ class NetBoxClient:
                 cable_peer_switch=cable_peer_switch,
                 cable_peer_port=cable_peer_port,
             ))
-            logger.debug(
-                "Found OOB interface",
-                extra={
-                    "device": device.get("name"),
-                    "interface": iface.get("name"),
-                    "mac": mac,
-                    "oob_ip": oob_ip.get("display"),
-                    "site": site_slug,
-                    "has_cable": cable is not None,
-                }
-            )
+            if debug:
+                logger.debug(
+                    "Found OOB interface %s:%s mac=%s oob_ip=%s site=%s has_cable=%s",
+                    device.get("name"),
+                    iface.get("name"),
+                    mac,
+                    oob_ip.get("display"),
+                    site_slug,
+                    cable is not None,
+                    extra={
+                        "device": device.get("name"),
+                        "interface": iface.get("name"),
+                        "mac": mac,
+                    },
+                )
 
-        logger.info(f"Found {len(result)} devices with OOB IP and MAC addresses")
+        logger.info("Found %s devices with OOB IP and MAC addresses", len(result))
         return result
 
-    def get_switches_by_site(self, site_slug: str) -> list[SwitchInfo]:
-        """Get switches for a specific site."""
-        params = {"site__slug": site_slug}
-        if self.config.switches_role:
-            params["role"] = self.config.switches_role
-
-        devices = self._get_all("dcim/devices/", params=params)
+    @staticmethod
+    def _devices_to_switchinfos(devices: Iterable[dict]) -> list[SwitchInfo]:
+        """Build SwitchInfo list from NetBox device data."""
         result = []
-
         for device in devices:
             primary_ip = device.get("primary_ip")
             ip_address = None
@@ -235,11 +359,15 @@ class NetBoxClient:
                 id=device.get("id"),
                 name=device.get("name"),
                 primary_ip=ip_address,
-                site=site_slug,
+                site=device.get("site", {}).get("slug") if device.get("site") else None,
             ))
 
         return result
 
+    def get_switches_by_site(self, site_slug: str) -> list[SwitchInfo]:
+        """Get switches for a specific site."""
+        return self.get_switches({site_slug})
+
     def get_switches(self, sites: Optional[set[str]] = None) -> list[SwitchInfo]:
         """
         Get list of switches to poll for FDB.
@@ -249,12 +377,15 @@ class NetBoxClient:
                    If None, uses config filters.
         """
         if sites:
-            # Получаем коммутаторы для каждого сайта
-            result = []
-            for site_slug in sites:
-                switches = self.get_switches_by_site(site_slug)
-                result.extend(switches)
-            logger.info(f"Found {len(result)} switches for sites: {sites}")
+            # Один запрос на все сайты: site__slug=a&site__slug=b
+            site_params = [("site__slug", site_slug) for site_slug in sorted(sites)]
+            if self.config.switches_role:
+                site_params.append(("role", self.config.switches_role))
+
+            result = self._devices_to_switchinfos(
+                self._iter_all("dcim/devices/", params=site_params)
+            )
+            logger.info("Found %s switches for sites: %s", len(result), sites)
             return result
 
         # Fallback на старую логику если sites не указаны
@@ -265,57 +396,64 @@ class NetBoxClient:
         if not params:
             logger.warning("No switch filters configured, fetching all devices")
 
-        devices = self._get_all("dcim/devices/", params=params)
-        result = []
+        result = self._devices_to_switchinfos(self._iter_all("dcim/devices/", params=params))
+        logger.info("Found %s switches to poll", len(result))
+        return result
 
-        for device in devices:
-            primary_ip = device.get("primary_ip")
-            ip_address = None
-            if primary_ip:
-                ip_address = primary_ip.get("address", "").split("/")[0]
+    @staticmethod
+    def _to_switch_interface(iface: dict, switch_id: int) -> SwitchInterface:
+        """Build SwitchInterface from NetBox interface data."""
+        return SwitchInterface(
+            id=iface.get("id"),
+            name=iface.get("name"),
+            device_id=switch_id,
+            device_name=iface.get("device", {}).get("display") if iface.get("device") else "",
+            description=iface.get("description"),
+            has_cable=iface.get("cable") is not None,
+            mgmt_only=iface.get("mgmt_only", False),
+        )
 
-            result.append(SwitchInfo(
-                id=device.get("id"),
-                name=device.get("name"),
-                primary_ip=ip_address,
-                site=device.get("site", {}).get("slug") if device.get("site") else None,
-            ))
+    def prefetch_switch_interfaces(self, switch_ids: list[int]):
+        """
+        Fetch all interfaces of the given switches in bulk into the cache.
 
-        logger.info(f"Found {len(result)} switches to poll")
-        return result
+        Later get_switch_interface_by_name/by_index calls for these
+        switches are served without further requests.
+        """
+        count = 0
+        for i in range(0, len(switch_ids), BULK_ID_CHUNK):
+            chunk = switch_ids[i : i + BULK_ID_CHUNK]
+            params = [("device_id", switch_id) for switch_id in chunk]
+            params.append(("limit", BULK_PAGE_LIMIT))
+
+            for switch_id in chunk:
+                self._iface_cache[switch_id] = []
+                self._iface_name_index.pop(switch_id, None)
+            for iface in self._iter_all("dcim/interfaces/", params=params):
+                switch_id = iface["device"]["id"]
+                self._iface_cache.setdefault(switch_id, []).append(iface)
+                count += 1
+
+        logger.debug("Prefetched %s interfaces for %s switches", count, len(switch_ids))
 
     def get_switch_interface_by_name(
         self, switch_id: int, interface_name: str
     ) -> Optional[SwitchInterface]:
-        """Get switch interface by name, trying alternative name variants."""
+        """Get switch interface by name (case-insensitive), trying alternative name variants."""
         variants = generate_interface_name_variants(interface_name)
+        interfaces = self._interfaces_by_name(switch_id)
 
         for variant in variants:
-            interfaces = self._get_all(
-                "dcim/interfaces/",
-                params={"device_id": switch_id, "name": variant}
-            )
-
-            if interfaces:
+            iface = interfaces.get(variant.lower())
+            if iface is not None:
                 if variant != interface_name:
                     logger.debug(
-                        f"Interface matched via variant: {interface_name} -> {variant}"
+                        "Interface matched via variant: %s -> %s", interface_name, variant
                     )
-                iface = interfaces[0]
-                cable = iface.get("cable")
-
-                return SwitchInterface(
-                    id=iface.get("id"),
-                    name=iface.get("name"),
-                    device_id=switch_id,
-                    device_name=iface.get("device", {}).get("display") if iface.get("device") else "",
-                    description=iface.get("description"),
-                    has_cable=cable is not None,
-                    mgmt_only=iface.get("mgmt_only", False),
-                )
+                return self._to_switch_interface(iface, switch_id)
 
         logger.debug(
-            f"Interface not found on device {switch_id}, tried: {variants}"
+            "Interface not found on device %s, tried: %s", switch_id, variants
         )
         return None
 
@@ -328,24 +466,10 @@ class NetBoxClient:
         Note: NetBox stores custom fields, check if ifIndex is available.
         Fallback: get all interfaces and try to match by description or other means.
         """
-        interfaces = self._get_all(
-            "dcim/interfaces/",
-            params={"device_id": switch_id}
-        )
-
-        for iface in interfaces:
+        for iface in self._interfaces_for_switch(switch_id):
             custom_fields = iface.get("custom_fields", {})
             if custom_fields.get("if_index") == if_index:
-                cable = iface.get("cable")
-                return SwitchInterface(
-                    id=iface.get("id"),
-                    name=iface.get("name"),
-                    device_id=switch_id,
-                    device_name=iface.get("device", {}).get("display") if iface.get("device") else "",
-                    description=iface.get("description"),
-                    has_cable=cable is not None,
-                    mgmt_only=iface.get("mgmt_only", False),
-                )
+                return self._to_switch_interface(iface, switch_id)
 
         return None
 
@@ -366,17 +490,10 @@ class NetBoxClient:
 
         Returns created cable data or None if dry_run.
         """
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-
-        description_parts = [
-            "autocabling:ipmi",
-            f"source=fdb",
-            f"created={timestamp}",
-        ]
+        timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+        description = f"autocabling:ipmi | source=fdb | created={timestamp}"
         if vlan:
-            description_parts.append(f"vlan={vlan}")
-
-        description = " | ".join(description_parts)
+            description += f" | vlan={vlan}"
 
         cable_data = {
             "a_terminations": [
@@ -398,35 +515,22 @@ class NetBoxClient:
         if label:
             cable_data["label"] = label
 
+        log_extra = {
+            "server_interface_id": server_interface_id,
+            "switch_interface_id": switch_interface_id,
+        }
+
         if self.config.dry_run:
-            logger.info(
-                "DRY RUN: Would create cable",
-                extra={
-                    "server_interface_id": server_interface_id,
-                    "switch_interface_id": switch_interface_id,
-                    "description": description,
-                }
-            )
+            log_extra["description"] = description
+            logger.info("DRY RUN: Would create cable", extra=log_extra)
             return None
 
         try:
             result = self._post("dcim/cables/", cable_data)
-            logger.info(
-                "Created cable",
-                extra={
-                    "cable_id": result.get("id"),
-                    "server_interface_id": server_interface_id,
-                    "switch_interface_id": switch_interface_id,
-                }
-            )
+            log_extra["cable_id"] = result.get("id")
+            logger.info("Created cable", extra=log_extra)
             return result
         except requests.HTTPError as e:
-            logger.error(
-                "Failed to create cable",
-                extra={
-                    "error": str(e),
-                    "server_interface_id": server_interface_id,
-                    "switch_interface_id": switch_interface_id,
-                }
-            )
+            log_extra["error"] = str(e)
+            logger.error("Failed to create cable", extra=log_extra)
             raise
@@ -21,7 +21,7 @@ class PortType(Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PortClassification:
     """Result of port classification."""
 
@@ -36,7 +36,14 @@ class PortClassifier:
 
     def __init__(self, config: Config):
         self.config = config
-        self._uplink_pattern = config.get_uplink_pattern()
+        self._uplink_ports = frozenset(config.uplink_ports)
+        # Bound once; the matchers behind it are compiled once per Config
+        self._match_uplink = config.match_uplink
+        # Port names repeat heavily across switches and runs, so results are
+        # memoized by the full set of classify() arguments
+        self._classify_cache: dict[
+            tuple[str, Optional[str], bool, bool], PortClassification
+        ] = {}
 
     def classify(
         self,
@@ -57,7 +64,22 @@ class PortClassifier:
         Returns:
             PortClassification with type and reason
         """
-        if port_name in self.config.uplink_ports:
+        key = (port_name, port_description, is_lag_member, lldp_neighbor_is_switch)
+        classification = self._classify_cache.get(key)
+        if classification is None:
+            classification = self._classify(*key)
+            self._classify_cache[key] = classification
+        return classification
+
+    def _classify(
+        self,
+        port_name: str,
+        port_description: Optional[str],
+        is_lag_member: bool,
+        lldp_neighbor_is_switch: bool,
+    ) -> PortClassification:
+        """Classify a port (uncached)."""
+        if port_name in self._uplink_ports:
             return PortClassification(
                 port_name=port_name,
                 port_type=PortType.UPLINK,
@@ -65,21 +87,21 @@ class PortClassifier:
                 is_allowed=False,
             )
 
-        if port_description and self._uplink_pattern.search(port_description):
-            match = self._uplink_pattern.search(port_description)
+        if port_description and (
+            match := self._match_uplink(port_description)
+        ) is not None:
             return PortClassification(
                 port_name=port_name,
                 port_type=PortType.UPLINK,
-                reason=f"Description matches uplink pattern: '{match.group()}'",
+                reason=f"Description matches uplink pattern: '{match}'",
                 is_allowed=False,
             )
 
-        if self._uplink_pattern.search(port_name):
-            match = self._uplink_pattern.search(port_name)
+        if (match := self._match_uplink(port_name)) is not None:
             return PortClassification(
                 port_name=port_name,
                 port_type=PortType.UPLINK,
-                reason=f"Port name matches uplink pattern: '{match.group()}'",
+                reason=f"Port name matches uplink pattern: '{match}'",
                 is_allowed=False,
             )
 
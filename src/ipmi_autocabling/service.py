@@ -7,7 +7,7 @@ from typing import Optional
 
 from .config import Config
 from .correlator import Correlator, CorrelationResult
-from .fdb_collector import FDBCollector, FDBEntry
+from .fdb_collector import FDBCollector, index_fdb_by_mac, index_fdb_by_port
 from .mac_utils import normalize_mac
 from .netbox_client import NetBoxClient
 from .port_classifier import PortClassifier
@@ -66,11 +66,12 @@ class IPMIAutoCablingService:
         """Run single pass of auto-cabling."""
         logger.info("Starting OOB auto-cabling run")
         summary = RunSummary()
+        self.netbox.clear_cache()
 
         try:
             oob_interfaces = self.netbox.get_devices_with_oob()
             summary.total_ipmi = len(oob_interfaces)
-            logger.info(f"Found {summary.total_ipmi} devices with OOB IP")
+            logger.info("Found %s devices with OOB IP", summary.total_ipmi)
 
             if not oob_interfaces:
                 logger.warning("No devices with OOB IP found, nothing to do")
@@ -78,30 +79,41 @@ class IPMIAutoCablingService:
 
             # Собираем уникальные сайты из найденных устройств
             sites = {oob.site for oob in oob_interfaces if oob.site}
-            logger.info(f"Devices found on sites: {sites}")
+            logger.info("Devices found on sites: %s", sites)
 
             # Получаем коммутаторы только для этих сайтов
             switches = self.netbox.get_switches(sites=sites if sites else None)
-            logger.info(f"Found {len(switches)} switches to poll")
+            logger.info("Found %s switches to poll", len(switches))
 
             if not switches:
                 logger.warning("No switches found, cannot collect FDB")
                 return summary
 
-            all_fdb_entries: list[FDBEntry] = []
-            for switch in switches:
-                entries = self.fdb_collector.collect_fdb(
-                    switch_name=switch.name,
-                    switch_ip=switch.primary_ip or "",
-                )
-                all_fdb_entries.extend(entries)
+            fdb_by_switch = self.fdb_collector.collect_fdb_many(
+                [(switch.name, switch.primary_ip or "") for switch in switches]
+            )
+            logger.info(
+                "Collected %s FDB entries total",
+                sum(map(len, fdb_by_switch.values())),
+            )
 
-            logger.info(f"Collected {len(all_fdb_entries)} FDB entries total")
+            # Кабельным интерфейсам нужна только карта порт->MAC для проверки
+            # несоответствия, поэтому индекс по MAC строим, лишь когда есть
+            # интерфейсы без кабеля
+            if any(not oob.has_cable for oob in oob_interfaces):
+                fdb_by_mac = index_fdb_by_mac(fdb_by_switch)
+                logger.info("Indexed %s unique MACs", len(fdb_by_mac))
+            else:
+                fdb_by_mac = {}
 
+            # Состояние корреляции пишется одной короткой транзакцией внутри
+            # correlate(); создание кабелей (HTTP) идёт вне её, и статус CREATED
+            # фиксируется сразу после каждого POST
             results = self.correlator.correlate(
                 ipmi_interfaces=oob_interfaces,
-                fdb_entries=all_fdb_entries,
+                fdb_by_mac=fdb_by_mac,
                 switches=switches,
+                port_to_mac=index_fdb_by_port(fdb_by_switch),
             )
 
             for result in results:
@@ -121,7 +133,7 @@ class IPMIAutoCablingService:
             return summary
 
         except Exception as e:
-            logger.exception(f"Run failed with error: {e}")
+            logger.exception("Run failed with error: %s", e)
             raise
 
     def _process_result(self, result: CorrelationResult, summary: RunSummary):
@@ -144,31 +156,35 @@ class IPMIAutoCablingService:
         if result.status == MACStatus.MISMATCH:
             summary.mismatch += 1
             logger.warning(
-                f"{device_name}:{iface_name} - MAC MISMATCH! "
-                f"Expected {result.expected_mac} but found {result.actual_mac} "
-                f"on {result.switch_name}:{result.port_name}",
+                "%s:%s - MAC MISMATCH! Expected %s but found %s on %s:%s",
+                device_name,
+                iface_name,
+                result.expected_mac,
+                result.actual_mac,
+                result.switch_name,
+                result.port_name,
                 extra=log_extra,
             )
 
         elif result.status == MACStatus.EXISTS:
             summary.exists += 1
-            logger.info(f"{device_name}:{iface_name} - cable already exists", extra=log_extra)
+            logger.info("%s:%s - cable already exists", device_name, iface_name, extra=log_extra)
 
         elif result.status == MACStatus.NOT_FOUND:
             summary.not_found += 1
-            logger.info(f"{device_name}:{iface_name} - MAC not found in FDB", extra=log_extra)
+            logger.info("%s:%s - MAC not found in FDB", device_name, iface_name, extra=log_extra)
 
         elif result.status == MACStatus.AMBIGUOUS:
             summary.ambiguous += 1
-            logger.warning(f"{device_name}:{iface_name} - {result.reason}", extra=log_extra)
+            logger.warning("%s:%s - %s", device_name, iface_name, result.reason, extra=log_extra)
 
         elif result.status == MACStatus.SKIP_NON_ACCESS:
             summary.skipped += 1
-            logger.info(f"{device_name}:{iface_name} - skipped: {result.reason}", extra=log_extra)
+            logger.info("%s:%s - skipped: %s", device_name, iface_name, result.reason, extra=log_extra)
 
         elif result.status == MACStatus.ERROR:
             summary.errors += 1
-            logger.error(f"{device_name}:{iface_name} - error: {result.reason}", extra=log_extra)
+            logger.error("%s:%s - error: %s", device_name, iface_name, result.reason, extra=log_extra)
 
         elif result.status == MACStatus.PENDING:
             if result.is_stable and result.port_id:
@@ -178,7 +194,12 @@ class IPMIAutoCablingService:
                     self.state_db.update_status(mac, MACStatus.CREATED, cable.get("id"))
                     status_str = self.config.cable_status.upper()
                     logger.info(
-                        f"{device_name}:{iface_name} - cable CREATED ({status_str}) to {result.switch_name}:{result.port_name}",
+                        "%s:%s - cable CREATED (%s) to %s:%s",
+                        device_name,
+                        iface_name,
+                        status_str,
+                        result.switch_name,
+                        result.port_name,
                         extra=log_extra,
                     )
                 else:
@@ -187,7 +208,11 @@ class IPMIAutoCablingService:
             else:
                 summary.pending += 1
                 logger.info(
-                    f"{device_name}:{iface_name} - waiting for stability ({result.stability_count}/{self.config.stability_runs})",
+                    "%s:%s - waiting for stability (%s/%s)",
+                    device_name,
+                    iface_name,
+                    result.stability_count,
+                    self.config.stability_runs,
                     extra=log_extra,
                 )
 
@@ -200,20 +225,20 @@ class IPMIAutoCablingService:
                 vlan=result.vlan,
             )
         except Exception as e:
-            logger.error(f"Failed to create cable: {e}")
+            logger.error("Failed to create cable: %s", e)
             return None
 
     def run_daemon(self):
         """Run as daemon with periodic polling."""
-        logger.info(f"Starting daemon mode with poll interval {self.config.poll_interval}s")
+        logger.info("Starting daemon mode with poll interval %ss", self.config.poll_interval)
 
         while True:
             try:
                 self.run_once()
             except Exception as e:
-                logger.exception(f"Run failed: {e}")
+                logger.exception("Run failed: %s", e)
 
-            logger.info(f"Sleeping for {self.config.poll_interval}s")
+            logger.info("Sleeping for %ss", self.config.poll_interval)
             time.sleep(self.config.poll_interval)
 
     def close(self):
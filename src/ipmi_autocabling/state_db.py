@@ -2,14 +2,97 @@
 
 import sqlite3
 import logging
+import re
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import NamedTuple, Optional
 
 logger = logging.getLogger(__name__)
 
+# Timestamp columns stored as INTEGER epoch milliseconds
+_TIMESTAMP_COLUMNS = {
+    "mac_observations": ("seen_at", "last_action_at"),
+    "run_history": ("run_at",),
+}
+
+
+def _now_ms() -> int:
+    """Current time as epoch milliseconds."""
+    return int(time.time() * 1000)
+
+
+def _ms_to_datetime(ms: Optional[int]) -> Optional[datetime]:
+    """Convert epoch milliseconds from the database to an aware UTC datetime."""
+    if ms is None:
+        return None
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+# Max bound parameters per "IN (...)" query
+_SQL_IN_CHUNK = 500
+
+# Insert or refresh an observation; stability grows while the MAC stays
+# on the same switch port and restarts at 1 when it moves
+_SQL_UPSERT_OBSERVATION = """
+    INSERT INTO mac_observations (mac, switch_name, port_name, vlan, seen_at, stability_count)
+    VALUES (?, ?, ?, ?, ?, 1)
+    ON CONFLICT(mac) DO UPDATE SET
+        stability_count = CASE
+            WHEN mac_observations.switch_name = excluded.switch_name
+             AND mac_observations.port_name = excluded.port_name
+            THEN mac_observations.stability_count + 1
+            ELSE 1
+        END,
+        switch_name = excluded.switch_name,
+        port_name = excluded.port_name,
+        vlan = excluded.vlan,
+        seen_at = excluded.seen_at
+"""
+_SQL_UPSERT_OBSERVATION_RETURNING = _SQL_UPSERT_OBSERVATION + "RETURNING stability_count"
+
+_SQL_GET_STABILITY_IN = "SELECT mac, stability_count FROM mac_observations WHERE mac IN ({})"
+
+_SQL_GET_STATE = "SELECT * FROM mac_observations WHERE mac = ?"
+
+_SQL_GET_WITH_CABLES = "SELECT * FROM mac_observations WHERE cable_created = 1"
+
+_SQL_UPDATE_STATUS = """
+    UPDATE mac_observations
+    SET last_status = ?, last_action_at = ?
+    WHERE mac = ?
+"""
+
+_SQL_UPDATE_STATUS_CREATED = """
+    UPDATE mac_observations
+    SET last_status = ?, last_action_at = ?, cable_created = 1, cable_id = ?
+    WHERE mac = ?
+"""
+
+_SQL_MARK_NOT_FOUND = """
+    INSERT INTO mac_observations (mac, stability_count, last_status, last_action_at)
+    VALUES (?, 0, ?, ?)
+    ON CONFLICT(mac) DO UPDATE SET
+        stability_count = 0,
+        last_status = excluded.last_status,
+        last_action_at = excluded.last_action_at
+"""
+
+_SQL_RECORD_RUN = """
+    INSERT INTO run_history
+    (run_at, total_macs, cnt_created, cnt_exists, cnt_skipped, cnt_ambiguous, cnt_not_found, cnt_errors)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Prepared statements kept per connection (sqlite3 default is 128)
+_CACHED_STATEMENTS = 256
+
+# Stored in PRAGMA user_version once the schema below is in place
+_SCHEMA_VERSION = 1
+
 
 class MACStatus(Enum):
     """Status of MAC address processing."""
@@ -24,7 +107,7 @@ class MACStatus(Enum):
     MISMATCH = "mismatch"  # MAC on cable port differs from expected
 
 
-@dataclass
+@dataclass(slots=True)
 class MACObservation:
     """Observation of a MAC address."""
 
@@ -36,7 +119,7 @@ class MACObservation:
     stability_count: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class MACState:
     """Full state of a MAC address."""
 
@@ -46,11 +129,45 @@ class MACState:
     last_vlan: Optional[int] = None
     last_seen: Optional[datetime] = None
     stability_count: int = 0
-    last_status: Optional[MACStatus] = None
+    last_status: Optional[str] = None  # MACStatus value, see last_status_enum
     last_action_at: Optional[datetime] = None
     cable_created: bool = False
     cable_id: Optional[int] = None
 
+    @property
+    def last_status_enum(self) -> Optional[MACStatus]:
+        """Last status as MACStatus (converted on access)."""
+        return MACStatus(self.last_status) if self.last_status else None
+
+
+class RunStats(NamedTuple):
+    """Counters of a single run, in run_history column order."""
+
+    total_macs: int
+    created: int
+    exists: int
+    skipped: int
+    ambiguous: int
+    not_found: int
+    errors: int
+    run_at: Optional[int] = None  # epoch ms, None means now
+
+
+def _row_to_state(row: sqlite3.Row) -> MACState:
+    """Build a MACState from a mac_observations row."""
+    return MACState(
+        mac=row["mac"],
+        last_switch=row["switch_name"],
+        last_port=row["port_name"],
+        last_vlan=row["vlan"],
+        last_seen=_ms_to_datetime(row["seen_at"]),
+        stability_count=row["stability_count"],
+        last_status=row["last_status"],
+        last_action_at=_ms_to_datetime(row["last_action_at"]),
+        cable_created=bool(row["cable_created"]),
+        cable_id=row["cable_id"],
+    )
+
 
 class StateDB:
     """SQLite-based state database."""
@@ -58,69 +175,155 @@ class StateDB:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self._conn: Optional[sqlite3.Connection] = None
+        self._in_batch = False
+        self._batch_now = 0
         self._init_db()
 
     def _init_db(self):
         """Initialize database schema."""
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
 
-        self._conn = sqlite3.connect(self.db_path)
+        self._conn = sqlite3.connect(self.db_path, cached_statements=_CACHED_STATEMENTS)
         self._conn.row_factory = sqlite3.Row
+        # Per-connection settings; NORMAL sync lets WAL commits skip a full fsync
+        self._conn.executescript("""
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-20000;
+            PRAGMA mmap_size=268435456;
+        """)
+
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != _SCHEMA_VERSION:
+            self._create_schema()
+
+        logger.debug("State database initialized at %s", self.db_path)
+
+    def _create_schema(self):
+        """Create tables and indexes, migrate older layouts, stamp the schema version."""
+        # journal_mode is stored in the database file, so setting it once is enough
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+        # One transaction for tables, migration and version stamp (DDL is
+        # transactional in SQLite): a failure leaves the old layout untouched
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS mac_observations (
+                    mac TEXT PRIMARY KEY,
+                    switch_name TEXT,
+                    port_name TEXT,
+                    vlan INTEGER,
+                    seen_at INTEGER,  -- epoch ms
+                    stability_count INTEGER DEFAULT 0,
+                    last_status TEXT,
+                    last_action_at INTEGER,  -- epoch ms
+                    cable_created INTEGER DEFAULT 0,
+                    cable_id INTEGER
+                )
+            """)
 
-        self._conn.execute("""
-            CREATE TABLE IF NOT EXISTS mac_observations (
-                mac TEXT PRIMARY KEY,
-                switch_name TEXT,
-                port_name TEXT,
-                vlan INTEGER,
-                seen_at TEXT,
-                stability_count INTEGER DEFAULT 0,
-                last_status TEXT,
-                last_action_at TEXT,
-                cable_created INTEGER DEFAULT 0,
-                cable_id INTEGER
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS run_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_at INTEGER,  -- epoch ms
+                    total_macs INTEGER,
+                    cnt_created INTEGER,
+                    cnt_exists INTEGER,
+                    cnt_skipped INTEGER,
+                    cnt_ambiguous INTEGER,
+                    cnt_not_found INTEGER,
+                    cnt_errors INTEGER
+                )
+            """)
+
+            self._migrate_timestamps()
+
+            # Partial index: only rows with a cable, used by get_all_with_cables
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_cable_created
+                ON mac_observations(cable_created) WHERE cable_created = 1
+            """)
+
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        except BaseException:
+            self._conn.rollback()
+            raise
+        self._conn.commit()
+
+    def _migrate_timestamps(self):
+        """Convert ISO-8601 TEXT timestamp columns of older databases to epoch ms."""
+        for table, columns in _TIMESTAMP_COLUMNS.items():
+            table_info = self._conn.execute(f"PRAGMA table_info({table})").fetchall()
+            if all(row["type"] != "TEXT" for row in table_info if row["name"] in columns):
+                continue
+
+            logger.info("Migrating %s timestamps to epoch milliseconds", table)
+            create_sql = self._conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone()[0]
+            names = [row["name"] for row in table_info]
+            select = ", ".join(
+                f"CAST(ROUND((julianday({name}) - 2440587.5) * 86400000) AS INTEGER)"
+                if name in columns
+                else name
+                for name in names
             )
-        """)
+            for name in columns:
+                create_sql = re.sub(rf"\b{name} TEXT\b", f"{name} INTEGER", create_sql)
 
-        self._conn.execute("""
-            CREATE TABLE IF NOT EXISTS run_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                run_at TEXT,
-                total_macs INTEGER,
-                cnt_created INTEGER,
-                cnt_exists INTEGER,
-                cnt_skipped INTEGER,
-                cnt_ambiguous INTEGER,
-                cnt_not_found INTEGER,
-                cnt_errors INTEGER
+            self._conn.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+            self._conn.execute(create_sql)
+            self._conn.execute(
+                f"INSERT INTO {table} ({', '.join(names)}) SELECT {select} FROM {table}_old"
             )
-        """)
+            self._conn.execute(f"DROP TABLE {table}_old")
 
-        self._conn.commit()
-        logger.debug(f"State database initialized at {self.db_path}")
+    def _commit(self):
+        """Commit unless inside batch(), which commits once at the end."""
+        if not self._in_batch:
+            self._conn.commit()
+
+    def _now(self) -> int:
+        """Timestamp for a write: shared by all writes of a batch."""
+        return self._batch_now if self._in_batch else _now_ms()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Group writes into a single transaction.
+
+        Commits on normal exit, rolls back if the block raises.
+        Nested batch() calls join the outer transaction. All writes in
+        the batch share the timestamp taken when it started.
+        """
+        if self._in_batch:
+            yield
+            return
+
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN IMMEDIATE")
+        self._batch_now = _now_ms()
+        self._in_batch = True
+        try:
+            yield
+        except BaseException:
+            self._conn.rollback()
+            raise
+        else:
+            self._conn.commit()
+        finally:
+            self._in_batch = False
 
     def get_state(self, mac: str) -> Optional[MACState]:
         """Get current state for a MAC address."""
-        cursor = self._conn.execute(
-            "SELECT * FROM mac_observations WHERE mac = ?", (mac,)
-        )
+        cursor = self._conn.execute(_SQL_GET_STATE, (mac,))
         row = cursor.fetchone()
 
         if not row:
             return None
 
-        return MACState(
-            mac=row["mac"],
-            last_switch=row["switch_name"],
-            last_port=row["port_name"],
-            last_vlan=row["vlan"],
-            last_seen=datetime.fromisoformat(row["seen_at"]) if row["seen_at"] else None,
-            stability_count=row["stability_count"],
-            last_status=MACStatus(row["last_status"]) if row["last_status"] else None,
-            last_action_at=datetime.fromisoformat(row["last_action_at"]) if row["last_action_at"] else None,
-            cable_created=bool(row["cable_created"]),
-            cable_id=row["cable_id"],
-        )
+        return _row_to_state(row)
 
     def update_observation(
         self,
@@ -136,30 +339,53 @@ class StateDB:
         Returns:
             (stability_count, is_stable) tuple
         """
-        now = datetime.now(timezone.utc).isoformat()
-        state = self.get_state(mac)
+        now = self._now()
 
-        if state is None:
-            self._conn.execute("""
-                INSERT INTO mac_observations (mac, switch_name, port_name, vlan, seen_at, stability_count)
-                VALUES (?, ?, ?, ?, ?, 1)
-            """, (mac, switch_name, port_name, vlan, now))
-            self._conn.commit()
-            return (1, 1 >= stability_threshold)
+        cursor = self._conn.execute(
+            _SQL_UPSERT_OBSERVATION_RETURNING,
+            (mac, switch_name, port_name, vlan, now),
+        )
+        new_count = cursor.fetchone()[0]
+        self._commit()
 
-        if state.last_switch == switch_name and state.last_port == port_name:
-            new_count = state.stability_count + 1
-        else:
-            new_count = 1
+        return (new_count, new_count >= stability_threshold)
 
-        self._conn.execute("""
-            UPDATE mac_observations
-            SET switch_name = ?, port_name = ?, vlan = ?, seen_at = ?, stability_count = ?
-            WHERE mac = ?
-        """, (switch_name, port_name, vlan, now, new_count, mac))
-        self._conn.commit()
+    def update_observations_bulk(
+        self,
+        observations: Iterable[tuple[str, str, str, Optional[int]]],
+        stability_threshold: int,
+    ) -> dict[str, tuple[int, bool]]:
+        """
+        Update many MAC observations at once.
 
-        return (new_count, new_count >= stability_threshold)
+        Args:
+            observations: (mac, switch_name, port_name, vlan) tuples
+            stability_threshold: runs on the same port needed to be stable
+
+        Returns:
+            dict mapping mac to (stability_count, is_stable)
+        """
+        now = self._now()
+        macs = []
+
+        def rows():
+            for mac, switch_name, port_name, vlan in observations:
+                macs.append(mac)
+                yield (mac, switch_name, port_name, vlan, now)
+
+        self._conn.executemany(_SQL_UPSERT_OBSERVATION, rows())
+
+        result = {}
+        for i in range(0, len(macs), _SQL_IN_CHUNK):
+            chunk = macs[i : i + _SQL_IN_CHUNK]
+            cursor = self._conn.execute(
+                _SQL_GET_STABILITY_IN.format(",".join("?" * len(chunk))), chunk
+            )
+            for mac, count in cursor:
+                result[mac] = (count, count >= stability_threshold)
+        self._commit()
+
+        return result
 
     def update_status(
         self,
@@ -168,41 +394,23 @@ class StateDB:
         cable_id: Optional[int] = None,
     ):
         """Update MAC status after processing."""
-        now = datetime.now(timezone.utc).isoformat()
+        now = self._now()
 
         if status == MACStatus.CREATED:
-            self._conn.execute("""
-                UPDATE mac_observations
-                SET last_status = ?, last_action_at = ?, cable_created = 1, cable_id = ?
-                WHERE mac = ?
-            """, (status.value, now, cable_id, mac))
+            self._conn.execute(
+                _SQL_UPDATE_STATUS_CREATED, (status.value, now, cable_id, mac)
+            )
         else:
-            self._conn.execute("""
-                UPDATE mac_observations
-                SET last_status = ?, last_action_at = ?
-                WHERE mac = ?
-            """, (status.value, now, mac))
+            self._conn.execute(_SQL_UPDATE_STATUS, (status.value, now, mac))
 
-        self._conn.commit()
+        self._commit()
 
     def mark_not_found(self, mac: str):
         """Mark MAC as not found (reset stability)."""
-        now = datetime.now(timezone.utc).isoformat()
-        state = self.get_state(mac)
-
-        if state:
-            self._conn.execute("""
-                UPDATE mac_observations
-                SET stability_count = 0, last_status = ?, last_action_at = ?
-                WHERE mac = ?
-            """, (MACStatus.NOT_FOUND.value, now, mac))
-        else:
-            self._conn.execute("""
-                INSERT INTO mac_observations (mac, stability_count, last_status, last_action_at)
-                VALUES (?, 0, ?, ?)
-            """, (mac, MACStatus.NOT_FOUND.value, now))
+        now = self._now()
+        self._conn.execute(_SQL_MARK_NOT_FOUND, (mac, MACStatus.NOT_FOUND.value, now))
 
-        self._conn.commit()
+        self._commit()
 
     def record_run(
         self,
@@ -215,34 +423,27 @@ class StateDB:
         errors: int,
     ):
         """Record run statistics."""
-        now = datetime.now(timezone.utc).isoformat()
-        self._conn.execute("""
-            INSERT INTO run_history
-            (run_at, total_macs, cnt_created, cnt_exists, cnt_skipped, cnt_ambiguous, cnt_not_found, cnt_errors)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (now, total_macs, created, exists, skipped, ambiguous, not_found, errors))
-        self._conn.commit()
+        self.record_runs(
+            [RunStats(total_macs, created, exists, skipped, ambiguous, not_found, errors)]
+        )
+
+    def record_runs(self, runs: Iterable[RunStats]):
+        """Record statistics of several runs with one executemany (e.g. backfill)."""
+        now = self._now()
+        self._conn.executemany(
+            _SQL_RECORD_RUN,
+            ((now if run.run_at is None else run.run_at, *run[:-1]) for run in runs),
+        )
+        self._commit()
+
+    def iter_with_cables(self) -> Iterator[MACState]:
+        """Iterate over MACs where cables were created, one row at a time."""
+        for row in self._conn.execute(_SQL_GET_WITH_CABLES):
+            yield _row_to_state(row)
 
     def get_all_with_cables(self) -> list[MACState]:
         """Get all MACs where cables were created."""
-        cursor = self._conn.execute(
-            "SELECT * FROM mac_observations WHERE cable_created = 1"
-        )
-        return [
-            MACState(
-                mac=row["mac"],
-                last_switch=row["switch_name"],
-                last_port=row["port_name"],
-                last_vlan=row["vlan"],
-                last_seen=datetime.fromisoformat(row["seen_at"]) if row["seen_at"] else None,
-                stability_count=row["stability_count"],
-                last_status=MACStatus(row["last_status"]) if row["last_status"] else None,
-                last_action_at=datetime.fromisoformat(row["last_action_at"]) if row["last_action_at"] else None,
-                cable_created=bool(row["cable_created"]),
-                cable_id=row["cable_id"],
-            )
-            for row in cursor.fetchall()
-        ]
+        return list(self.iter_with_cables())
 
     def close(self):
         """Close database connection."""
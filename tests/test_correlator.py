@@ -0,0 +1,247 @@
+"""Tests for MAC correlator."""
+
+import pytest
+
+from src.ipmi_autocabling.config import Config
+from src.ipmi_autocabling.correlator import Correlator
+from src.ipmi_autocabling.fdb_collector import FDBEntry, index_fdb_by_mac, index_fdb_by_port
+from src.ipmi_autocabling.mac_utils import mac_to_bytes
+from src.ipmi_autocabling.netbox_client import IPMIInterface, NetBoxClient, SwitchInfo
+from src.ipmi_autocabling.port_classifier import PortClassifier
+from src.ipmi_autocabling.state_db import MACStatus, StateDB
+
+
+class FakeNetBox(NetBoxClient):
+    """NetBox client serving switch interfaces from memory."""
+
+    def __init__(self, interfaces: list[dict]):
+        super().__init__(Config(netbox_url="http://netbox"))
+        self.interfaces = interfaces
+        self.bulk_calls: list[list[int]] = []
+
+    def prefetch_switch_interfaces(self, switch_ids):
+        self.bulk_calls.append(list(switch_ids))
+        super().prefetch_switch_interfaces(switch_ids)
+
+    def _iter_all(self, endpoint, params=None):
+        pairs = params.items() if isinstance(params, dict) else params
+        device_ids = {value for key, value in pairs if key == "device_id"}
+        return iter([i for i in self.interfaces if i["device"]["id"] in device_ids])
+
+
+def iface(iface_id, name, switch_id, cable=None):
+    return {"id": iface_id, "name": name, "device": {"id": switch_id, "display": f"sw{switch_id}"}, "cable": cable}
+
+
+@pytest.fixture
+def config():
+    cfg = Config()
+    cfg.stability_runs = 1
+    cfg.mlag_groups = [("sw1", "sw2")]
+    return cfg
+
+
+@pytest.fixture
+def switches():
+    return [SwitchInfo(id=1, name="sw1"), SwitchInfo(id=2, name="sw2")]
+
+
+@pytest.fixture
+def netbox():
+    return FakeNetBox([
+        iface(101, "GE1/0/1", 1),
+        iface(102, "GE1/0/2", 1, cable={"id": 5}),
+        iface(201, "GE1/0/1", 2),
+    ])
+
+
+@pytest.fixture
+def correlator(config, netbox, tmp_path):
+    state_db = StateDB(str(tmp_path / "state.db"))
+    yield Correlator(config, netbox, state_db, PortClassifier(config))
+    state_db.close()
+
+
+def ipmi(mac, has_cable=False, peer_switch=None, peer_port=None):
+    return IPMIInterface(
+        device_id=1,
+        device_name="server01",
+        interface_id=10,
+        interface_name="IPMI",
+        mac_address=mac,
+        has_cable=has_cable,
+        cable_peer_switch=peer_switch,
+        cable_peer_port=peer_port,
+    )
+
+
+def fdb(*entries, switch="all"):
+    """Build one switch's FDB from (mac, switch, port) tuples."""
+    return {
+        switch: [
+            FDBEntry(mac=mac_to_bytes(mac), switch_name=sw, switch_ip="", port_name=port, port_index=0)
+            for mac, sw, port in entries
+        ]
+    }
+
+
+def correlate(correlator, ipmi_interfaces, fdb_by_switch, switches):
+    return correlator.correlate(
+        ipmi_interfaces,
+        index_fdb_by_mac(fdb_by_switch),
+        switches,
+        index_fdb_by_port(fdb_by_switch),
+    )
+
+
+class TestCorrelator:
+    def test_ready_for_cable(self, correlator, switches):
+        results = correlate(
+            correlator,
+            [ipmi("aa:bb:cc:dd:ee:01")],
+            fdb(("aa:bb:cc:dd:ee:01", "sw1", "GigabitEthernet1/0/1")),
+            switches,
+        )
+        assert results[0].status == MACStatus.PENDING
+        assert results[0].is_stable is True
+        assert results[0].port_id == 101
+
+    def test_not_found(self, correlator, switches):
+        results = correlate(correlator, [ipmi("aa:bb:cc:dd:ee:01")], {}, switches)
+        assert results[0].status == MACStatus.NOT_FOUND
+
+    def test_switch_port_has_cable(self, correlator, switches):
+        results = correlate(
+            correlator,
+            [ipmi("aa:bb:cc:dd:ee:01")],
+            fdb(("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/2")),
+            switches,
+        )
+        assert results[0].status == MACStatus.SKIP_NON_ACCESS
+        assert "already has cable" in results[0].reason
+
+    def test_interface_not_found(self, correlator, switches):
+        results = correlate(
+            correlator,
+            [ipmi("aa:bb:cc:dd:ee:01")],
+            fdb(("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/9")),
+            switches,
+        )
+        assert results[0].status == MACStatus.ERROR
+
+    def test_mlag_peers_resolved(self, correlator, switches):
+        results = correlate(
+            correlator,
+            [ipmi("aa:bb:cc:dd:ee:01")],
+            fdb(
+                ("aa:bb:cc:dd:ee:01", "sw2", "GE1/0/1"),
+                ("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1"),
+            ),
+            switches,
+        )
+        assert results[0].status == MACStatus.PENDING
+
+    def test_ambiguous(self, correlator, switches):
+        results = correlate(
+            correlator,
+            [ipmi("aa:bb:cc:dd:ee:01")],
+            fdb(
+                ("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1"),
+                ("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/3"),
+            ),
+            switches,
+        )
+        assert results[0].status == MACStatus.AMBIGUOUS
+
+    def test_cable_exists(self, correlator, switches):
+        results = correlate(
+            correlator,
+            [ipmi("aa:bb:cc:dd:ee:01", has_cable=True, peer_switch="sw1", peer_port="GE1/0/1")],
+            fdb(("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1")),
+            switches,
+        )
+        assert results[0].status == MACStatus.EXISTS
+
+    def test_mismatch(self, correlator, switches):
+        results = correlate(
+            correlator,
+            [ipmi("aa:bb:cc:dd:ee:01", has_cable=True, peer_switch="sw1", peer_port="GE1/0/1")],
+            fdb(("aa:bb:cc:dd:ee:02", "sw1", "GE1/0/1")),
+            switches,
+        )
+        assert results[0].status == MACStatus.MISMATCH
+        assert results[0].actual_mac == "aa:bb:cc:dd:ee:02"
+
+    def test_interfaces_prefetched_once(self, correlator, netbox, switches):
+        correlate(
+            correlator,
+            [ipmi("aa:bb:cc:dd:ee:01"), ipmi("aa:bb:cc:dd:ee:02")],
+            fdb(
+                ("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1"),
+                ("aa:bb:cc:dd:ee:02", "sw2", "GE1/0/1"),
+            ),
+            switches,
+        )
+        assert netbox.bulk_calls == [[1, 2]]
+
+    def test_prefetch_limited_to_observed_switches(self, correlator, netbox, switches):
+        correlate(
+            correlator,
+            [ipmi("aa:bb:cc:dd:ee:01"), ipmi("aa:bb:cc:dd:ee:02")],
+            fdb(("aa:bb:cc:dd:ee:02", "sw2", "GE1/0/1")),
+            switches,
+        )
+        assert netbox.bulk_calls == [[2]]
+
+    def test_fully_cabled_run_skips_prefetch(self, correlator, netbox, switches):
+        results = correlate(
+            correlator,
+            [ipmi("aa:bb:cc:dd:ee:01", has_cable=True, peer_switch="sw1", peer_port="GE1/0/1")],
+            fdb(("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1")),
+            switches,
+        )
+        assert results[0].status == MACStatus.EXISTS
+        assert netbox.bulk_calls == []
+
+    def test_all_not_found_skips_prefetch(self, correlator, netbox, switches):
+        results = correlate(correlator, [ipmi("aa:bb:cc:dd:ee:01")], {}, switches)
+        assert results[0].status == MACStatus.NOT_FOUND
+        assert netbox.bulk_calls == []
+
+    def test_state_written_outside_netbox_calls(self, correlator, netbox, switches):
+        in_transaction = []
+        fetch = netbox.prefetch_switch_interfaces
+
+        def bulk(switch_ids):
+            in_transaction.append(correlator.state_db._conn.in_transaction)
+            fetch(switch_ids)
+
+        netbox.prefetch_switch_interfaces = bulk
+        correlate(
+            correlator,
+            [ipmi("aa:bb:cc:dd:ee:01")],
+            fdb(("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1")),
+            switches,
+        )
+        assert in_transaction == [False]
+        assert correlator.state_db._conn.in_transaction is False
+        assert correlator.state_db.get_state("aa:bb:cc:dd:ee:01").stability_count == 1
+
+    def test_port_mac_follows_collection_order(self, correlator, switches):
+        # Shared-LOM port: host MAC, then BMC MAC. An upstream switch polled
+        # earlier sees the BMC MAC first, which must not change the winner.
+        fdb_by_switch = {
+            **fdb(("aa:bb:cc:dd:ee:01", "sw2", "GE1/0/48"), switch="sw2"),
+            **fdb(
+                ("aa:bb:cc:dd:ee:99", "sw1", "GE1/0/1"),
+                ("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1"),
+                switch="sw1",
+            ),
+        }
+        results = correlate(
+            correlator,
+            [ipmi("aa:bb:cc:dd:ee:01", has_cable=True, peer_switch="sw1", peer_port="GE1/0/1")],
+            fdb_by_switch,
+            switches,
+        )
+        assert results[0].status == MACStatus.EXISTS
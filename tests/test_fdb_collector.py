@@ -0,0 +1,208 @@
+"""Tests for FDB collector."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.ipmi_autocabling import fdb_collector
+from src.ipmi_autocabling.config import Config
+from src.ipmi_autocabling.fdb_collector import (
+    DOT1D_TP_FDB_PORT,
+    DOT1Q_TP_FDB_PORT,
+    HW_MAC_FWD_PORT,
+    IF_NAME,
+    FDBCollector,
+)
+from src.ipmi_autocabling.mac_utils import mac_to_str
+
+if not fdb_collector.PYSNMP_AVAILABLE:
+    pytest.skip("pysnmp not installed", allow_module_level=True)
+
+from pysnmp.proto.rfc1902 import Integer, ObjectName, OctetString
+from pysnmp.proto.rfc1905 import EndOfMibView
+
+
+def vb(oid: str, value):
+    """Build a var-bind as returned by pysnmp."""
+    return (ObjectName(oid), value)
+
+
+@pytest.fixture
+def collector():
+    return FDBCollector(Config(fdb_workers=2))
+
+
+class TestParsers:
+    def test_interface_names(self):
+        names = FDBCollector._parse_interface_names([
+            vb(f"{IF_NAME}.5", OctetString("GE1/0/5")),
+            vb(f"{IF_NAME}.6", OctetString("GE1/0/6")),
+        ])
+        assert names == {5: "GE1/0/5", 6: "GE1/0/6"}
+
+    def test_huawei(self):
+        entries = FDBCollector._parse_huawei_fdb("sw1", "192.0.2.1", {5: "GE1/0/5"}, [
+            vb(f"{HW_MAC_FWD_PORT}.0.224.237.219.143.82.10.0", Integer(5)),
+            vb(f"{HW_MAC_FWD_PORT}.0.224.237", Integer(5)),  # truncated index
+        ])
+        assert len(entries) == 1
+        assert mac_to_str(entries[0].mac) == "00:e0:ed:db:8f:52"
+        assert entries[0].vlan == 10
+        assert entries[0].port_name == "GE1/0/5"
+        assert entries[0].port_index == 5
+
+    def test_q_bridge(self):
+        entries = FDBCollector._parse_q_bridge_fdb("sw1", "192.0.2.1", {}, [
+            vb(f"{DOT1Q_TP_FDB_PORT}.100.170.187.204.221.238.1", Integer(7)),
+        ])
+        assert mac_to_str(entries[0].mac) == "aa:bb:cc:dd:ee:01"
+        assert entries[0].vlan == 100
+        assert entries[0].port_name == "port7"
+
+    def test_bridge_last_port_wins(self):
+        entries = FDBCollector._parse_bridge_fdb("sw1", "192.0.2.1", {3: "GE1/0/3"}, [
+            vb(f"{DOT1D_TP_FDB_PORT}.170.187.204.221.238.1", Integer(2)),
+            vb(f"{DOT1D_TP_FDB_PORT}.170.187.204.221.238.1", Integer(3)),
+        ])
+        assert len(entries) == 1
+        assert entries[0].port_name == "GE1/0/3"
+        assert entries[0].vlan is None
+
+
+class TestWalk:
+    def test_sync_walk_stops_on_error(self, collector, monkeypatch):
+        pages = [
+            (None, 0, 0, [vb(f"{IF_NAME}.1", OctetString("GE1/0/1"))]),
+            ("requestTimedOut", 0, 0, []),
+            (None, 0, 0, [vb(f"{IF_NAME}.2", OctetString("GE1/0/2"))]),
+        ]
+        monkeypatch.setattr(fdb_collector, "bulkCmd", lambda *args, **kwargs: iter(pages))
+
+        var_binds = list(collector._walk("192.0.2.1", IF_NAME))
+        assert [str(value) for _, value in var_binds] == ["GE1/0/1"]
+
+    def test_sync_walk_builds_fresh_object_per_walk(self, collector, monkeypatch):
+        objects = []
+
+        def bulk_cmd(*args, **kwargs):
+            objects.append(args[-1])
+            return iter([])
+
+        monkeypatch.setattr(fdb_collector, "bulkCmd", bulk_cmd)
+        list(collector._walk("192.0.2.1", IF_NAME))
+        list(collector._walk("192.0.2.2", IF_NAME))
+        assert objects[0] is not objects[1]
+
+    def _fake_async_bulk(self, monkeypatch, pages):
+        requests = []
+
+        async def bulk_cmd(engine, community, target, context, non_repeaters, max_reps, obj):
+            requests.append(obj)
+            return pages[len(requests) - 1]
+
+        monkeypatch.setattr(fdb_collector, "asyncBulkCmd", bulk_cmd)
+        return requests
+
+    def test_async_walk_stops_at_subtree_end(self, collector, monkeypatch):
+        requests = self._fake_async_bulk(monkeypatch, [
+            (None, 0, 0, [
+                [vb(f"{IF_NAME}.1", OctetString("GE1/0/1"))],
+                [vb(f"{IF_NAME}.2", OctetString("GE1/0/2"))],
+            ]),
+            (None, 0, 0, [
+                [vb(f"{IF_NAME}.3", OctetString("GE1/0/3"))],
+                [vb("1.3.6.1.2.1.31.1.1.1.2.1", Integer(0))],  # next column
+            ]),
+        ])
+
+        var_binds = asyncio.run(collector._async_bulk_walk(None, "192.0.2.1", IF_NAME))
+        assert [str(value) for _, value in var_binds] == ["GE1/0/1", "GE1/0/2", "GE1/0/3"]
+        assert len(requests) == 2
+
+    def test_async_walk_stops_at_end_of_mib(self, collector, monkeypatch):
+        self._fake_async_bulk(monkeypatch, [
+            (None, 0, 0, [
+                [vb(f"{IF_NAME}.1", OctetString("GE1/0/1"))],
+                [vb(f"{IF_NAME}.1", EndOfMibView())],
+            ]),
+        ])
+
+        var_binds = asyncio.run(collector._async_bulk_walk(None, "192.0.2.1", IF_NAME))
+        assert len(var_binds) == 1
+
+    def test_async_walk_stops_when_oid_does_not_advance(self, collector, monkeypatch):
+        page = (None, 0, 0, [[vb(f"{IF_NAME}.1", OctetString("GE1/0/1"))]])
+        requests = self._fake_async_bulk(monkeypatch, [page, page, page])
+
+        var_binds = asyncio.run(collector._async_bulk_walk(None, "192.0.2.1", IF_NAME))
+        assert len(requests) == 2
+        assert [str(value) for _, value in var_binds] == ["GE1/0/1"]
+
+    def test_async_walk_stops_on_oid_going_backwards_within_page(self, collector, monkeypatch):
+        self._fake_async_bulk(monkeypatch, [
+            (None, 0, 0, [
+                [vb(f"{IF_NAME}.2", OctetString("GE1/0/2"))],
+                [vb(f"{IF_NAME}.1", OctetString("GE1/0/1"))],
+            ]),
+        ])
+
+        var_binds = asyncio.run(collector._async_bulk_walk(None, "192.0.2.1", IF_NAME))
+        assert [str(value) for _, value in var_binds] == ["GE1/0/2"]
+
+
+class TestMibFallback:
+    def test_falls_back_and_remembers_mib(self, collector, monkeypatch):
+        walked = []
+
+        def walk(switch_ip, oid):
+            walked.append(oid)
+            if oid == DOT1Q_TP_FDB_PORT:
+                return [vb(f"{DOT1Q_TP_FDB_PORT}.100.170.187.204.221.238.1", Integer(7))]
+            return []
+
+        monkeypatch.setattr(collector, "_get_interface_names", lambda switch_ip: {7: "GE1/0/7"})
+        monkeypatch.setattr(collector, "_walk", walk)
+
+        assert collector._mib_order("sw1") == ["huawei", "q_bridge", "bridge"]
+        entries = collector.collect_fdb("sw1", "192.0.2.1")
+        assert [e.port_name for e in entries] == ["GE1/0/7"]
+        assert walked == [HW_MAC_FWD_PORT, DOT1Q_TP_FDB_PORT]
+
+        walked.clear()
+        assert collector._mib_order("sw1") == ["q_bridge", "huawei", "bridge"]
+        collector.collect_fdb("sw1", "192.0.2.1")
+        assert walked == [DOT1Q_TP_FDB_PORT]
+
+
+class TestCollectManyAsync:
+    def test_concurrency_limited_by_fdb_workers(self, collector, monkeypatch):
+        running = 0
+        peak = 0
+
+        async def collect_fdb_async(switch_name, switch_ip, snmp_engine=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return []
+
+        closed = []
+        monkeypatch.setattr(collector, "_create_async_snmp_engine", lambda: "engine")
+        monkeypatch.setattr(collector, "_close_async_snmp_engine", closed.append)
+        monkeypatch.setattr(collector, "collect_fdb_async", collect_fdb_async)
+
+        switches = [(f"sw{i}", f"192.0.2.{i}") for i in range(5)]
+        result = asyncio.run(collector.collect_fdb_many_async(switches))
+        assert list(result) == [name for name, _ in switches]
+        assert peak == 2
+        assert closed == ["engine"]
+
+    def test_engine_dispatcher_closed(self):
+        closed = []
+        dispatcher = SimpleNamespace(closeDispatcher=lambda: closed.append(True))
+
+        FDBCollector._close_async_snmp_engine(SimpleNamespace(transportDispatcher=dispatcher))
+        FDBCollector._close_async_snmp_engine(SimpleNamespace(transportDispatcher=None))
+        assert closed == [True]
@@ -0,0 +1,162 @@
+"""Tests for log formatters."""
+
+import io
+import json
+import logging
+import subprocess
+import sys
+import time
+
+import pytest
+
+from src.ipmi_autocabling.logging_config import (
+    BufferedStreamHandler,
+    JSONFormatter,
+    KeyValueFormatter,
+    setup_logging,
+)
+
+
+def make_record(created: float = 1700000000.25, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+    record.created = created
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJSONFormatter:
+    def test_timestamp_from_record(self):
+        data = json.loads(JSONFormatter().format(make_record()))
+        assert data["timestamp"] == "2023-11-14T22:13:20.250000Z"
+        assert data["message"] == "hello world"
+
+    def test_timestamp_prefix_rebuilt_on_new_second(self):
+        formatter = JSONFormatter()
+        first = json.loads(formatter.format(make_record(1700000000.5)))
+        second = json.loads(formatter.format(make_record(1700000001.0)))
+        assert first["timestamp"] == "2023-11-14T22:13:20.500000Z"
+        assert second["timestamp"] == "2023-11-14T22:13:21.000000Z"
+
+    def test_extra_fields(self):
+        data = json.loads(JSONFormatter().format(make_record(mac="aa:bb:cc:dd:ee:ff", port="GE1/0/1")))
+        assert data["mac"] == "aa:bb:cc:dd:ee:ff"
+        assert data["port"] == "GE1/0/1"
+        assert "device" not in data
+
+
+class TestKeyValueFormatter:
+    def test_format(self):
+        line = KeyValueFormatter().format(make_record(device="server01"))
+        assert line == 'ts=2023-11-14T22:13:20+00:00 level=INFO msg="hello world" device=server01'
+
+    def test_quotes_values_with_spaces(self):
+        line = KeyValueFormatter().format(make_record(device="rack 1 server", port=7))
+        assert line.endswith(' device="rack 1 server" port=7')
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+        super().flush()
+
+
+class TestBufferedStreamHandler:
+    def test_emit_does_not_flush(self):
+        stream = CountingStream()
+        handler = BufferedStreamHandler(stream, flush_interval=60)
+        handler.emit(make_record())
+        assert stream.getvalue() == "hello world\n"
+        assert stream.flushes == 0
+        handler.close()
+        assert stream.flushes == 1
+
+    def test_periodic_flush(self):
+        stream = CountingStream()
+        handler = BufferedStreamHandler(stream, flush_interval=0.01)
+        handler.emit(make_record())
+        deadline = time.monotonic() + 2
+        while stream.flushes == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        handler.close()
+        assert stream.flushes > 0
+
+
+class TestSetupLogging:
+    @pytest.fixture(autouse=True)
+    def restore_root_logger(self):
+        root_logger = logging.getLogger()
+        handlers, level = root_logger.handlers[:], root_logger.level
+        yield
+        for handler in root_logger.handlers[:]:
+            root_logger.removeHandler(handler)
+            handler.close()
+        for handler in handlers:
+            root_logger.addHandler(handler)
+        root_logger.setLevel(level)
+        root_logger.__dict__.pop("_autocabling_settings", None)
+
+    def test_formatter_dispatch(self):
+        setup_logging("DEBUG", "kv")
+        root_logger = logging.getLogger()
+        assert root_logger.level == logging.DEBUG
+        assert isinstance(root_logger.handlers[-1].formatter, KeyValueFormatter)
+
+    def test_same_settings_keep_handler(self):
+        setup_logging("info", "json")
+        handler = logging.getLogger().handlers[-1]
+        setup_logging("INFO", "json")
+        assert logging.getLogger().handlers == [handler]
+
+    def test_handler_writes_to_sys_stdout(self):
+        setup_logging("INFO", "json")
+        setup_logging("INFO", "text")
+        assert logging.getLogger().handlers[-1].stream is sys.stdout
+
+    def test_new_settings_replace_handler(self):
+        setup_logging("INFO", "json")
+        handler = logging.getLogger().handlers[-1]
+        setup_logging("INFO", "text")
+        assert logging.getLogger().handlers[-1] is not handler
+        assert len(logging.getLogger().handlers) == 1
+
+
+def test_sigterm_flushes_buffered_output():
+    script = """
+import logging, os, signal, time
+from src.ipmi_autocabling.__main__ import _exit_on_sigterm
+from src.ipmi_autocabling.logging_config import setup_logging
+setup_logging(level="INFO", format_type="text")
+signal.signal(signal.SIGTERM, _exit_on_sigterm)
+logging.getLogger("t").info("first line")
+logging.getLogger("t").info("last line")
+os.kill(os.getpid(), signal.SIGTERM)
+time.sleep(5)
+"""
+    proc = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, timeout=30
+    )
+    assert proc.returncode == 128 + 15
+    assert "first line" in proc.stdout
+    assert "last line" in proc.stdout
+
+
+def test_log_lines_stay_in_order_with_print():
+    script = """
+import logging
+from src.ipmi_autocabling.logging_config import setup_logging
+setup_logging(level="INFO", format_type="text")
+print("before")
+logging.getLogger("t").info("logged")
+print("after")
+"""
+    proc = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, timeout=30
+    )
+    lines = proc.stdout.splitlines()
+    assert lines[0] == "before"
+    assert lines[1].endswith("logged")
+    assert lines[2] == "after"
@@ -4,6 +4,8 @@ import pytest
 
 from src.ipmi_autocabling.mac_utils import (
     normalize_mac,
+    mac_to_bytes,
+    mac_to_str,
     mac_to_oid_suffix,
     oid_suffix_to_mac,
 )
@@ -37,6 +39,36 @@ class TestNormalizeMac:
         with pytest.raises(ValueError):
             normalize_mac("GG:HH:II:JJ:KK:LL")
 
+    def test_inner_whitespace_rejected(self):
+        with pytest.raises(ValueError):
+            normalize_mac("AABBCCDDEE F")
+
+    @pytest.mark.parametrize(
+        "mac", ["aabbcc dd ee", "aa:bb:cc dd:ee", "aabbccdd\teee", "aabbccddee+f", "aabbccddeeé1"]
+    )
+    def test_embedded_whitespace_and_non_hex_rejected(self, mac):
+        with pytest.raises(ValueError):
+            normalize_mac(mac)
+
+
+class TestMacBytes:
+    def test_mac_to_bytes(self):
+        assert mac_to_bytes("AABB.CCDD.EEFF") == b"\xaa\xbb\xcc\xdd\xee\xff"
+
+    def test_mac_to_str(self):
+        assert mac_to_str(b"\xaa\xbb\xcc\xdd\xee\xff") == "aa:bb:cc:dd:ee:ff"
+
+    def test_invalid_mac(self):
+        with pytest.raises(ValueError):
+            mac_to_bytes("AA:BB:CC")
+
+    @pytest.mark.parametrize("mac", ["aabbcc dd ee", "aabb ccdd eeff", "aa:bb:cc:dd:ee:f\n"])
+    def test_whitespace_inside_rejected(self, mac):
+        with pytest.raises(ValueError):
+            mac_to_bytes(mac)
+        with pytest.raises(ValueError):
+            mac_to_oid_suffix(mac)
+
 
 class TestMacToOidSuffix:
     def test_conversion(self):
@@ -0,0 +1,218 @@
+"""Tests for NetBox client."""
+
+import json
+
+import pytest
+
+from src.ipmi_autocabling.config import Config
+from src.ipmi_autocabling.netbox_client import HTTP_RETRY, NetBoxClient
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.content = json.dumps(data).encode()
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """requests.Session stub serving list endpoints from in-memory objects."""
+
+    def __init__(self, objects: dict[str, list[dict]]):
+        self.objects = objects
+        self.calls = []
+
+    def get(self, url, params=None):
+        endpoint = url.split("/api/", 1)[1]
+        self.calls.append((endpoint, params))
+        results = self.objects[endpoint]
+        if isinstance(params, list):
+            ids = {value for key, value in params if key == "id"}
+            if ids:
+                results = [obj for obj in results if obj["id"] in ids]
+        return FakeResponse({"results": results, "next": None})
+
+
+@pytest.fixture
+def objects():
+    return {
+        "dcim/devices/": [
+            {"id": 1, "name": "server01", "oob_ip": {"id": 11}, "site": {"slug": "dc1"}},
+            {"id": 2, "name": "server02", "oob_ip": {"id": 12}},
+            {"id": 3, "name": "server03", "oob_ip": {"id": 13}},
+            {"id": 4, "name": "server04", "oob_ip": None},
+        ],
+        "ipam/ip-addresses/": [
+            {"id": 11, "assigned_object": {"id": 21}},
+            {"id": 12, "assigned_object": {"id": 22}},
+            {"id": 13, "assigned_object": None},
+        ],
+        "dcim/interfaces/": [
+            {
+                "id": 21,
+                "name": "IPMI",
+                "mac_address": "AA:BB:CC:DD:EE:01",
+                "cable": {"id": 5},
+                "link_peers": [{"name": "GE1/0/1", "device": {"name": "sw1"}}],
+            },
+            {"id": 22, "name": "IPMI", "mac_address": None, "cable": None},
+        ],
+    }
+
+
+@pytest.fixture
+def client(objects):
+    client = NetBoxClient(Config(netbox_url="http://netbox"))
+    client.session = FakeSession(objects)
+    return client
+
+
+class TestGetDevicesWithOob:
+    def test_builds_ipmi_interfaces(self, client):
+        result = client.get_devices_with_oob()
+        assert len(result) == 1
+        ipmi = result[0]
+        assert ipmi.device_name == "server01"
+        assert ipmi.interface_id == 21
+        assert ipmi.mac_address == "aa:bb:cc:dd:ee:01"
+        assert ipmi.site == "dc1"
+        assert ipmi.has_cable is True
+        assert ipmi.cable_peer_switch == "sw1"
+        assert ipmi.cable_peer_port == "GE1/0/1"
+
+    def test_bulk_requests(self, client):
+        client.get_devices_with_oob()
+        assert [endpoint for endpoint, _ in client.session.calls] == [
+            "dcim/devices/",
+            "ipam/ip-addresses/",
+            "dcim/interfaces/",
+        ]
+
+    def test_invalid_mac_skipped(self, client, objects):
+        objects["dcim/interfaces/"][0]["mac_address"] = "not-a-mac"
+        assert client.get_devices_with_oob() == []
+
+
+class PagedSession:
+    """requests.Session stub serving fixed pages linked by "next" URLs."""
+
+    def __init__(self, pages: list[list[dict]]):
+        self.pages = pages
+        self.calls = []
+
+    def get(self, url, params=None):
+        self.calls.append((url, params))
+        page = len(self.calls) - 1
+        next_url = f"http://netbox/api/page/{page + 1}/" if page + 1 < len(self.pages) else None
+        return FakeResponse({"results": self.pages[page], "next": next_url})
+
+
+class TestPagination:
+    def test_iter_all_fetches_pages_lazily(self):
+        client = NetBoxClient(Config(netbox_url="http://netbox"))
+        client.session = PagedSession([[{"id": 1}, {"id": 2}], [{"id": 3}]])
+
+        results = client._iter_all("dcim/devices/", params={"role": "switch"})
+        assert next(results) == {"id": 1}
+        assert len(client.session.calls) == 1
+
+        assert [obj["id"] for obj in results] == [2, 3]
+        assert client.session.calls[1] == ("http://netbox/api/page/1/", {})
+
+    def test_get_all_returns_list(self):
+        client = NetBoxClient(Config(netbox_url="http://netbox"))
+        client.session = PagedSession([[{"id": 1}], [{"id": 2}]])
+        assert client._get_all("dcim/devices/") == [{"id": 1}, {"id": 2}]
+
+
+class TestGetSwitches:
+    def test_sites_fetched_in_one_query(self):
+        client = NetBoxClient(Config(netbox_url="http://netbox", switches_role="access-switch"))
+        client.session = PagedSession([[
+            {"id": 1, "name": "sw1", "primary_ip": {"address": "10.0.0.1/24"}, "site": {"slug": "dc1"}},
+            {"id": 2, "name": "sw2", "primary_ip": None, "site": {"slug": "dc2"}},
+        ]])
+
+        switches = client.get_switches({"dc2", "dc1"})
+
+        assert client.session.calls == [(
+            "http://netbox/api/dcim/devices/",
+            [("site__slug", "dc1"), ("site__slug", "dc2"), ("role", "access-switch")],
+        )]
+        assert [(sw.name, sw.primary_ip, sw.site) for sw in switches] == [
+            ("sw1", "10.0.0.1", "dc1"),
+            ("sw2", None, "dc2"),
+        ]
+
+
+class TestCreateCable:
+    def test_dry_run_description(self, caplog):
+        client = NetBoxClient(Config(netbox_url="http://netbox", dry_run=True))
+        with caplog.at_level("INFO"):
+            assert client.create_cable(10, 101, vlan=20) is None
+
+        description = caplog.records[-1].description
+        prefix, created, vlan = description.rsplit(" | ", 2)
+        assert prefix == "autocabling:ipmi | source=fdb"
+        assert created.startswith("created=") and created.endswith("Z")
+        assert len(created) == len("created=2024-01-01T00:00:00Z")
+        assert vlan == "vlan=20"
+
+
+class TestNestedAssignedObject:
+    def test_complete_nested_interface_skips_fetch(self, client, objects):
+        objects["ipam/ip-addresses/"] = [
+            {
+                "id": 11,
+                "assigned_object": {
+                    "id": 21,
+                    "name": "BMC",
+                    "mac_address": "AA:BB:CC:DD:EE:09",
+                    "cable": None,
+                },
+            },
+        ]
+        result = client.get_devices_with_oob()
+        assert [(i.interface_name, i.mac_address) for i in result] == [("BMC", "aa:bb:cc:dd:ee:09")]
+        assert "dcim/interfaces/" not in [endpoint for endpoint, _ in client.session.calls]
+
+    def test_partial_nested_interface_is_fetched(self, client):
+        client.get_devices_with_oob()
+        iface_calls = [params for endpoint, params in client.session.calls if endpoint == "dcim/interfaces/"]
+        assert len(iface_calls) == 1
+        assert ("id", 21) in iface_calls[0]
+
+
+class TestInterfaceCache:
+    @pytest.fixture
+    def client(self):
+        client = NetBoxClient(Config(netbox_url="http://netbox"))
+        client.session = FakeSession({"dcim/interfaces/": [
+            {"id": 101, "name": "GE1/0/1", "device": {"id": 1, "display": "sw1"}, "cable": None},
+            {"id": 102, "name": "GE1/0/2", "device": {"id": 1, "display": "sw1"}, "cable": None,
+             "custom_fields": {"if_index": 7}},
+        ]})
+        return client
+
+    def test_lookups_share_one_fetch(self, client):
+        assert client.get_switch_interface_by_name(1, "GigabitEthernet1/0/1").id == 101
+        assert client.get_switch_interface_by_index(1, 7).id == 102
+        assert client.get_switch_interface_by_name(1, "GE1/0/9") is None
+        assert len(client.session.calls) == 1
+
+    def test_prefetch_serves_lookups(self, client):
+        assert client.prefetch_switch_interfaces([1]) is None
+        assert client.get_switch_interface_by_name(1, "ge1/0/2").id == 102
+        assert client.get_switch_interface_by_index(1, 7).id == 102
+        assert len(client.session.calls) == 1
+
+    def test_clear_cache_refetches(self, client):
+        client.get_switch_interface_by_name(1, "GE1/0/1")
+        client.clear_cache()
+        client.get_switch_interface_by_name(1, "GE1/0/1")
+        assert len(client.session.calls) == 2
+
+
+def test_exhausted_retries_keep_http_error_path():
+    assert HTTP_RETRY.raise_on_status is False
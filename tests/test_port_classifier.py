@@ -76,3 +76,37 @@ class TestPortClassifier:
         assert classifier.is_access_port("Ethernet1") is True
         assert classifier.is_access_port("Ethernet49") is False
         assert classifier.is_access_port("Ethernet10", port_description="uplink") is False
+
+    def test_regex_pattern_description(self, classifier):
+        result = classifier.classify("Ethernet10", port_description="link To-Spine01")
+        assert result.port_type == PortType.UPLINK
+        assert "'To-Spine'" in result.reason
+
+    def test_literal_pattern_keeps_original_case(self, classifier):
+        result = classifier.classify("Ethernet10", port_description="MLAG keepalive")
+        assert result.port_type == PortType.UPLINK
+        assert "'MLAG'" in result.reason
+
+    def test_classification_is_cached(self, classifier):
+        first = classifier.classify("Ethernet1")
+        assert classifier.classify("Ethernet1") is first
+        assert classifier.classify("Ethernet1", port_description="uplink") is not first
+
+
+class TestUplinkMatching:
+    def test_changed_patterns_take_effect(self):
+        cfg = Config()
+        assert cfg.match_uplink("Uplink to core") == "Uplink"
+
+        cfg.uplink_patterns = ["spine"]
+        assert cfg.match_uplink("Uplink to core") is None
+
+        cfg.uplink_patterns.append(r"^po\d+")
+        assert cfg.match_uplink("Po12") == "Po12"
+
+    def test_get_uplink_pattern(self):
+        cfg = Config()
+        cfg.uplink_patterns = ["uplink", r"^po\d+"]
+        match = cfg.get_uplink_pattern().search("PO7")
+        assert match.group() == "PO7"
+        assert match.lastindex == 2
@@ -0,0 +1,212 @@
+"""Tests for state database."""
+
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from src.ipmi_autocabling.state_db import MACStatus, RunStats, StateDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    state_db = StateDB(str(tmp_path / "state.db"))
+    yield state_db
+    state_db.close()
+
+
+class TestStateDB:
+    def test_wal_mode(self, db):
+        assert db._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_schema_version_skips_setup_on_reopen(self, tmp_path):
+        path = str(tmp_path / "state.db")
+        StateDB(path).close()
+
+        conn = sqlite3.connect(path)
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 1
+        conn.execute("DROP INDEX idx_cable_created")
+        conn.close()
+
+        reopened = StateDB(path)
+        indexes = reopened._conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name = 'idx_cable_created'"
+        ).fetchall()
+        reopened.close()
+        assert indexes == []
+
+    def test_observation_stability(self, db):
+        assert db.update_observation("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1", 10, 2) == (1, False)
+        assert db.update_observation("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1", 10, 2) == (2, True)
+        assert db.update_observation("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/2", 10, 2) == (1, False)
+
+        state = db.get_state("aa:bb:cc:dd:ee:01")
+        assert state.last_port == "GE1/0/2"
+        assert state.last_vlan == 10
+        assert state.last_seen is not None
+
+    def test_bulk_observations(self, db):
+        db.update_observation("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1", None, 2)
+        result = db.update_observations_bulk(
+            [
+                ("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1", None),
+                ("aa:bb:cc:dd:ee:02", "sw1", "GE1/0/2", 10),
+            ],
+            stability_threshold=2,
+        )
+        assert result == {
+            "aa:bb:cc:dd:ee:01": (2, True),
+            "aa:bb:cc:dd:ee:02": (1, False),
+        }
+        assert db.get_state("aa:bb:cc:dd:ee:02").last_vlan == 10
+
+    def test_update_status_created(self, db):
+        db.update_observation("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1", None, 1)
+        db.update_status("aa:bb:cc:dd:ee:01", MACStatus.CREATED, cable_id=42)
+
+        state = db.get_state("aa:bb:cc:dd:ee:01")
+        assert state.last_status == MACStatus.CREATED.value
+        assert state.last_status_enum is MACStatus.CREATED
+        assert state.cable_created is True
+        assert state.cable_id == 42
+        assert [s.mac for s in db.get_all_with_cables()] == ["aa:bb:cc:dd:ee:01"]
+        assert [s.cable_id for s in db.iter_with_cables()] == [42]
+
+    def test_cables_query_uses_partial_index(self, db):
+        plan = db._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM mac_observations WHERE cable_created = 1"
+        ).fetchall()
+        assert any("idx_cable_created" in row["detail"] for row in plan)
+
+    def test_mark_not_found(self, db):
+        db.mark_not_found("aa:bb:cc:dd:ee:01")
+        assert db.get_state("aa:bb:cc:dd:ee:01").last_status == MACStatus.NOT_FOUND.value
+
+        db.update_observation("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1", None, 2)
+        db.mark_not_found("aa:bb:cc:dd:ee:01")
+        state = db.get_state("aa:bb:cc:dd:ee:01")
+        assert state.stability_count == 0
+        assert state.last_port == "GE1/0/1"
+
+    def test_record_run(self, db):
+        db.record_run(10, 1, 2, 3, 0, 4, 0)
+        row = db._conn.execute("SELECT total_macs, cnt_not_found FROM run_history").fetchone()
+        assert tuple(row) == (10, 4)
+
+    def test_record_runs(self, db):
+        db.record_runs([RunStats(5, 1, 1, 1, 1, 1, 0, run_at=1000), RunStats(7, 0, 0, 0, 0, 0, 7)])
+        rows = db._conn.execute(
+            "SELECT run_at, total_macs, cnt_errors FROM run_history ORDER BY id"
+        ).fetchall()
+        assert tuple(rows[0]) == (1000, 5, 0)
+        assert rows[1]["run_at"] > 1000
+        assert rows[1]["cnt_errors"] == 7
+
+
+class TestBatch:
+    def test_commits_once_at_end(self, db):
+        other = StateDB(db.db_path)
+        try:
+            with db.batch():
+                db.update_observation("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1", None, 1)
+                db.update_status("aa:bb:cc:dd:ee:01", MACStatus.PENDING)
+                assert other.get_state("aa:bb:cc:dd:ee:01") is None
+            assert other.get_state("aa:bb:cc:dd:ee:01").last_status == MACStatus.PENDING.value
+        finally:
+            other.close()
+
+    def test_rollback_on_error(self, db):
+        with pytest.raises(RuntimeError):
+            with db.batch():
+                db.mark_not_found("aa:bb:cc:dd:ee:01")
+                raise RuntimeError("boom")
+        assert db.get_state("aa:bb:cc:dd:ee:01") is None
+
+    def test_nested_batch_joins_outer(self, db):
+        with db.batch():
+            with db.batch():
+                db.mark_not_found("aa:bb:cc:dd:ee:01")
+            assert db._in_batch
+        assert db.get_state("aa:bb:cc:dd:ee:01") is not None
+
+    def test_batch_shares_timestamp(self, db):
+        with db.batch():
+            db.update_observation("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1", None, 1)
+            time.sleep(0.01)
+            db.mark_not_found("aa:bb:cc:dd:ee:02")
+        first = db.get_state("aa:bb:cc:dd:ee:01").last_seen
+        second = db.get_state("aa:bb:cc:dd:ee:02").last_action_at
+        assert first == second
+
+
+def _create_old_db(path, run_history_extra=""):
+    """Create a database in the pre-migration layout (ISO-8601 TEXT timestamps)."""
+    conn = sqlite3.connect(path)
+    conn.executescript(f"""
+        CREATE TABLE mac_observations (
+            mac TEXT PRIMARY KEY,
+            switch_name TEXT,
+            port_name TEXT,
+            vlan INTEGER,
+            seen_at TEXT,
+            stability_count INTEGER DEFAULT 0,
+            last_status TEXT,
+            last_action_at TEXT,
+            cable_created INTEGER DEFAULT 0,
+            cable_id INTEGER
+        );
+        CREATE TABLE run_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_at TEXT,
+            total_macs INTEGER,
+            cnt_created INTEGER,
+            cnt_exists INTEGER,
+            cnt_skipped INTEGER,
+            cnt_ambiguous INTEGER,
+            cnt_not_found INTEGER,
+            cnt_errors INTEGER{run_history_extra}
+        );
+        INSERT INTO mac_observations (mac, switch_name, port_name, seen_at, stability_count, last_status)
+        VALUES ('aa:bb:cc:dd:ee:01', 'sw1', 'GE1/0/1', '2024-01-02T03:04:05.678000+00:00', 3, 'pending');
+        INSERT INTO run_history (run_at, total_macs) VALUES ('2024-01-02T03:04:05+00:00', 7);
+    """)
+    conn.close()
+
+
+class TestTimestampMigration:
+    def test_iso_text_columns_converted(self, tmp_path):
+        path = str(tmp_path / "old.db")
+        _create_old_db(path)
+
+        db = StateDB(path)
+        try:
+            state = db.get_state("aa:bb:cc:dd:ee:01")
+            assert state.last_seen == datetime(2024, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc)
+            assert state.last_action_at is None
+            assert state.stability_count == 3
+            assert db._conn.execute("SELECT run_at FROM run_history").fetchone()[0] == 1704164645000
+
+            assert db.update_observation("aa:bb:cc:dd:ee:01", "sw1", "GE1/0/1", None, 2) == (4, True)
+            assert db._conn.execute("SELECT typeof(seen_at) FROM mac_observations").fetchone()[0] == "integer"
+        finally:
+            db.close()
+
+    def test_failed_migration_leaves_old_layout_intact(self, tmp_path):
+        path = str(tmp_path / "old.db")
+        # The CHECK rejects converted run_at values, so copying run_history
+        # fails after mac_observations has already been rebuilt
+        _create_old_db(path, run_history_extra=", CHECK (typeof(run_at) != 'integer')")
+
+        with pytest.raises(sqlite3.IntegrityError):
+            StateDB(path)
+
+        conn = sqlite3.connect(path)
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            assert not {"mac_observations_old", "run_history_old"} & tables
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+            row = conn.execute("SELECT typeof(seen_at), stability_count FROM mac_observations").fetchone()
+            assert row == ("text", 3)
+        finally:
+            conn.close()